@@ -0,0 +1,263 @@
+"""Throughput benchmarks of full_match() over synthetic key lists.
+
+Each pattern is run over key lists of every scale and key length, and the
+keys/sec, per-key latency percentiles and peak memory of filtering are
+reported; latencies and memory are measured on the first keys of a list. Results
+are compared with a stored baseline; a drop in keys/sec by more than the
+tolerance is reported as a regression and makes the script exit with 1.
+
+    python benchmarks/bench.py
+    python benchmarks/bench.py --scales 1000,10000,100000 --lengths 8,512
+    python benchmarks/bench.py --save-baseline
+
+Baselines are machine-specific; save one on the machine that compares. A
+baseline records the platform and Python version it was saved with, and is
+not compared with results from another environment.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+import typing as t
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import keylix  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SCALES = [1000]
+DEFAULT_LENGTHS = [8, 64, 512]
+DEFAULT_TOLERANCE = 0.2
+# Per-key latencies and peak memory are measured on at most this many keys.
+SAMPLE_SIZE = 1000
+# Key lists are filtered repeatedly for at least this long.
+MIN_MEASURE_SECONDS = 0.2
+
+# One pattern per pattern class, and composite patterns of real filters.
+PATTERNS = {
+    "wildcard": "*",
+    "chars": "tenant-042",
+    "parentheses": "(tenant*)",
+    "excludes": "~(*error*)",
+    "or": "tenant*|admin*|*backup",
+    "or_literals": "|".join(f"tenant-{i:03}" for i in range(16)),
+    "and": "*users*&~(*error*)",
+    "concat": "*/users/*/profile*",
+    "composite": "( *salad & ~(*peanut*) ) | *apples* | tenant-0*/users/*",
+}
+
+_WORDS = [
+    "tenant-",
+    "users",
+    "profile",
+    "admin",
+    "backup",
+    "error",
+    "salad",
+    "peanut",
+    "apples",
+    "cache",
+    "index",
+    "logs",
+]
+
+
+def make_keys(n: int, length: int, seed: int = 0) -> t.List[str]:
+    """Returns n deterministic keys of the given length made of path segments."""
+    rnd = random.Random(seed)
+    keys = []
+    for _ in range(n):
+        segments = []
+        size = 0
+        while size < length:
+            segment = rnd.choice(_WORDS)
+            if segment == "tenant-":
+                segment += f"{rnd.randrange(1000):03}"
+            elif rnd.random() < 0.3:
+                segment += str(rnd.randrange(10000))
+            segments.append(segment)
+            size += len(segment) + 1
+        keys.append("/".join(segments)[:length])
+    return keys
+
+
+def _percentile(sorted_values: t.List[float], fraction: float) -> float:
+    return sorted_values[
+        min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    ]
+
+
+def run_case(kx_pattern: keylix.KxPattern, keys: t.List[str]) -> t.Dict[str, float]:
+    full_match = kx_pattern.full_match
+
+    # Takes the fastest pass, so that one slow pass is not a regression.
+    elapsed = float("inf")
+    total = 0.0
+    while total < MIN_MEASURE_SECONDS or elapsed == float("inf"):
+        start = time.perf_counter()
+        matches = sum(1 for key in keys if full_match(key))
+        seconds = time.perf_counter() - start
+        elapsed = min(elapsed, seconds)
+        total += seconds
+
+    sample = keys[:SAMPLE_SIZE]
+    latencies = []
+    for key in sample:
+        key_start = time.perf_counter_ns()
+        full_match(key)
+        latencies.append((time.perf_counter_ns() - key_start) / 1000)
+    latencies.sort()
+
+    tracemalloc.start()
+    try:
+        [key for key in sample if full_match(key)]
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "keys": len(keys),
+        "matches": matches,
+        "keys_per_sec": len(keys) / elapsed if elapsed > 0 else float("inf"),
+        "p50_us": _percentile(latencies, 0.5),
+        "p90_us": _percentile(latencies, 0.9),
+        "p99_us": _percentile(latencies, 0.99),
+        "peak_kib": peak / 1024,
+    }
+
+
+def run(
+    pattern_names: t.List[str], scales: t.List[int], lengths: t.List[int]
+) -> t.Dict[str, t.Dict[str, float]]:
+    results = {}
+    for length in lengths:
+        for scale in scales:
+            keys = make_keys(scale, length)
+            for name in pattern_names:
+                case = f"{name}/{scale}/{length}"
+                results[case] = run_case(keylix.compile(PATTERNS[name]), keys)
+                print(_format_result(case, results[case]), flush=True)
+    return results
+
+
+def _format_result(case: str, result: t.Dict[str, float]) -> str:
+    return (
+        f"{case:32} {result['keys_per_sec']:14,.0f} keys/s"
+        f"  p50 {result['p50_us']:8.2f}us  p90 {result['p90_us']:8.2f}us"
+        f"  p99 {result['p99_us']:8.2f}us  peak {result['peak_kib']:10,.1f}KiB"
+    )
+
+
+def compare(
+    results: t.Dict[str, t.Dict[str, float]],
+    baseline: t.Dict[str, t.Dict[str, float]],
+    tolerance: float,
+) -> t.List[str]:
+    """Returns a message for each case that got slower than the tolerance."""
+    regressions = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        expected = baseline[case]["keys_per_sec"]
+        if result["keys_per_sec"] < expected * (1 - tolerance):
+            regressions.append(
+                f"{case}: {result['keys_per_sec']:,.0f} keys/s,"
+                f" baseline {expected:,.0f} keys/s"
+            )
+        if result["matches"] != baseline[case]["matches"]:
+            regressions.append(
+                f"{case}: {result['matches']} matches,"
+                f" baseline {baseline[case]['matches']} matches"
+            )
+    return regressions
+
+
+def environment() -> t.Dict[str, str]:
+    """Returns the platform and Python version that results depend on."""
+    return {
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "python": f"{platform.python_implementation()} {platform.python_version()}",
+    }
+
+
+def _int_list(text: str) -> t.List[int]:
+    return [int(value) for value in text.split(",")]
+
+
+def main(argv: t.Optional[t.List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--patterns",
+        default=",".join(PATTERNS),
+        help="comma-separated pattern names (default: all)",
+    )
+    parser.add_argument(
+        "--scales",
+        type=_int_list,
+        default=DEFAULT_SCALES,
+        help="comma-separated key list sizes, e.g. 1000,10000000",
+    )
+    parser.add_argument(
+        "--lengths",
+        type=_int_list,
+        default=DEFAULT_LENGTHS,
+        help="comma-separated key lengths",
+    )
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store the results as the baseline instead of comparing",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    pattern_names = args.patterns.split(",")
+    for name in pattern_names:
+        if name not in PATTERNS:
+            parser.error(f"unknown pattern: {name}")
+    print(", ".join(environment().values()))
+    results = run(pattern_names, args.scales, args.lengths)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("environment") != environment():
+            baseline = None
+
+    if args.save_baseline:
+        # Results of another environment are replaced, not merged.
+        cases = {} if baseline is None else baseline["results"]
+        cases.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(
+                {"environment": environment(), "results": cases},
+                f,
+                indent=2,
+                sort_keys=True,
+            )
+            f.write("\n")
+        print(f"Saved the baseline to {args.baseline}.")
+        return 0
+
+    if baseline is None:
+        print(
+            f"No baseline for this environment at {args.baseline};"
+            " run with --save-baseline."
+        )
+        return 0
+    regressions = compare(results, baseline["results"], args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,30 @@
+from keylix.aio import afilter
+from keylix.arena import KxKeyArena
+from keylix.cache import KxCachedPattern, KxCacheInfo
+from keylix.core import (
+    KxMatch,
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternEmpty,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+)
+from keylix.dfa import KxDfa
+from keylix.files import scan_file
+from keylix.keyset import KxKeySet
+from keylix.keystore import KxKeyStore
+from keylix.parallel import filter_arena, filter_parallel
+from keylix.parser import KxSyntaxError, compile, parse
+from keylix.patternset import KxPatternSet
+from keylix.profiling import KxCallStats, KxProfileNode, KxProfiler
+from keylix.regex import (
+    KxRegexError,
+    compile_contains_regex,
+    compile_line_regex,
+    compile_regex,
+)
+from keylix.serialize import KxFormatError, KxPatternBundle, dump_bundle
@@ -0,0 +1,154 @@
+"""Aho-Corasick automaton over a list of literals."""
+
+import collections
+import typing as t
+
+
+class KxAhoCorasick:
+    """Finds any of many literals in time proportional to the string length.
+
+    Literals are identified by their index in the list. The goto transitions
+    form a trie of the literals, which is also used to match literals at a
+    given position.
+    """
+
+    _lengths: t.List[int]
+    # Per state: transitions, fail link, literals ending in the state, and
+    # literals ending in the state or in a state reached via fail links.
+    _goto: t.List[t.Dict[str, int]]
+    _fail: t.List[int]
+    _terminal: t.List[t.List[int]]
+    _output: t.List[t.List[int]]
+
+    def __init__(self, literals: t.Sequence[str]):
+        self._lengths = [len(literal) for literal in literals]
+        self._goto = [{}]
+        self._fail = [0]
+        self._terminal = [[]]
+        for i, literal in enumerate(literals):
+            state = 0
+            for char in literal:
+                next_state = self._goto[state].get(char)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][char] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._terminal.append([])
+                state = next_state
+            self._terminal[state].append(i)
+
+        self._output = [list(terminal) for terminal in self._terminal]
+        queue = collections.deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fail = self._fail[state]
+                while fail != 0 and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(char, 0)
+                self._fail[next_state] = fail
+                # Empty literals in the root are reported by search_first().
+                if fail != 0:
+                    self._output[next_state] = (
+                        self._output[next_state] + self._output[fail]
+                    )
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def prefix_ends(self, string: str, pos: int, endpos: int) -> t.Set[int]:
+        """Returns every end e in [pos, endpos] where string[pos:e] is a literal."""
+        if pos > endpos:
+            return set()
+        goto = self._goto
+        ends = {pos} if self._terminal[0] else set()
+        state = 0
+        for i in range(pos, endpos):
+            state = goto[state].get(string[i])
+            if state is None:
+                break
+            if self._terminal[state]:
+                ends.add(i + 1)
+        return ends
+
+    def full_match(self, string: str, pos: int, endpos: int) -> bool:
+        """Returns True if string[pos:endpos] is one of the literals."""
+        if pos > endpos:
+            return False
+        goto = self._goto
+        state = 0
+        for i in range(pos, endpos):
+            state = goto[state].get(string[i])
+            if state is None:
+                return False
+        return len(self._terminal[state]) > 0
+
+    def find_all(self, string: str, pos: int, endpos: int) -> t.Set[int]:
+        """Returns the indices of all literals found in string[pos:endpos]."""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = set(output[0])
+        state = 0
+        for i in range(pos, endpos):
+            char = string[i]
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found.update(output[state])
+        return found
+
+    def find_any(self, string: str, pos: int, endpos: int) -> bool:
+        """Returns True if any literal is found in string[pos:endpos]."""
+        pos = min(pos, len(string))
+        if pos > endpos:
+            return False
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        if output[0]:
+            return True
+        state = 0
+        for i in range(pos, endpos):
+            char = string[i]
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                return True
+        return False
+
+    def search_first(
+        self, string: str, pos: int, endpos: int
+    ) -> t.Union[t.Tuple[int, int, int], None]:
+        """Finds the literal with the lowest index in string[pos:endpos].
+
+        Returns (index, start, end) of its leftmost occurrence, or None.
+        """
+        # Like re, positions past the end of string start at its end.
+        pos = min(pos, len(string))
+        if pos > endpos:
+            return None
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        lengths = self._lengths
+        best = None
+        if output[0]:
+            index = min(output[0])
+            best = (index, pos, pos)
+        state = 0
+        for i in range(pos, endpos):
+            if best is not None and best[0] == 0:
+                break
+            char = string[i]
+            while state != 0 and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for index in output[state]:
+                # The first occurrence of a literal is its leftmost one.
+                if best is None or index < best[0]:
+                    best = (index, i + 1 - lengths[index], i + 1)
+        return best
@@ -0,0 +1,79 @@
+"""Streaming filters over asynchronous key sources."""
+
+import asyncio
+import concurrent.futures
+import typing as t
+
+from keylix.core import KxPattern
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def _filter_batch(kx_pattern: KxPattern, keys: t.List[str]) -> t.List[str]:
+    return [key for key in keys if kx_pattern.full_match(key)]
+
+
+async def afilter(
+    kx_pattern: KxPattern,
+    keys: t.AsyncIterable[str],
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    max_pending: t.Optional[int] = None,
+    executor: t.Optional[concurrent.futures.Executor] = None,
+    executor_min_batch: t.Optional[int] = None,
+) -> t.AsyncIterator[str]:
+    """Yields the keys that full-match kx_pattern as they arrive.
+
+    Keys are read into a queue of at most max_pending keys (batch_size by
+    default), so a slow consumer pauses the source. The keys available in
+    the queue, up to batch_size, are filtered together. Batches of at least
+    executor_min_batch keys (by default, full batches) are filtered in
+    executor, if one is given, so that the event loop is not blocked.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be positive.")
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_pending or batch_size)
+    # Batches hold at most batch_size keys, and the keys of one full queue.
+    largest_batch = min(batch_size, queue.maxsize)
+    if executor_min_batch is None:
+        executor_min_batch = largest_batch
+    elif executor_min_batch > largest_batch:
+        raise ValueError(
+            "executor_min_batch must not exceed batch_size and max_pending."
+        )
+
+    async def produce() -> None:
+        async for key in keys:
+            await queue.put(key)
+
+    loop = asyncio.get_running_loop()
+    producer = asyncio.ensure_future(produce())
+    try:
+        while True:
+            if queue.empty():
+                if producer.done():
+                    # Re-raises the errors of the key source.
+                    producer.result()
+                    break
+                getter = asyncio.ensure_future(queue.get())
+                await asyncio.wait(
+                    {getter, producer}, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not getter.done():
+                    getter.cancel()
+                    continue
+                batch = [getter.result()]
+            else:
+                batch = []
+            while len(batch) < batch_size and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            if executor is not None and len(batch) >= executor_min_batch:
+                matches = await loop.run_in_executor(
+                    executor, _filter_batch, kx_pattern, batch
+                )
+            else:
+                matches = _filter_batch(kx_pattern, batch)
+            for key in matches:
+                yield key
+    finally:
+        producer.cancel()
@@ -0,0 +1,133 @@
+"""Keys stored in one shared memory block, for filtering in other processes."""
+
+import array
+import typing as t
+from multiprocessing import shared_memory
+
+from keylix.core import KxPattern, KxString
+
+_OFFSET_SIZE = 8
+
+
+def _filter_range(
+    kx_pattern: KxPattern,
+    data: t.Union[bytes, bytearray, memoryview],
+    offsets: t.Sequence[int],
+    start: int,
+    stop: int,
+) -> "array.array[int]":
+    # Returns the indices i in [start, stop) of the keys data[offsets[i]:
+    # offsets[i + 1]] that full-match kx_pattern, matching in place. The
+    # UTF-8 regex of the pattern is used where it has one.
+    indices = array.array("Q")
+    regex = kx_pattern.bytes_regex()
+    if regex is None:
+        full_match = kx_pattern.full_match
+        for i in range(start, stop):
+            if full_match(data, offsets[i], offsets[i + 1]):
+                indices.append(i)
+        return indices
+    re_fullmatch = regex.fullmatch
+    for i in range(start, stop):
+        if re_fullmatch(data, offsets[i], offsets[i + 1]) is not None:
+            indices.append(i)
+    return indices
+
+
+class KxKeyArena:
+    """Keys encoded as UTF-8 in one shared memory block.
+
+    The block holds the offsets of the keys, len(keys) + 1 unsigned 64-bit
+    integers, followed by the concatenated keys. Pickling an arena only
+    sends the name of the block, so worker processes attach to the same
+    memory; KxPattern.filter_arena() matches keys in place. The process
+    that created the arena must unlink() it when done.
+    """
+
+    _shm: shared_memory.SharedMemory
+    _count: int
+    _offsets: memoryview
+    _data: memoryview
+
+    def __init__(self, shm: shared_memory.SharedMemory, count: int):
+        self._shm = shm
+        self._count = count
+        offsets_size = (count + 1) * _OFFSET_SIZE
+        self._offsets = shm.buf[:offsets_size].cast("Q")
+        self._data = shm.buf[offsets_size:]
+
+    @classmethod
+    def create(cls, keys: t.Iterable[KxString]) -> "KxKeyArena":
+        """Creates an arena in a new shared memory block holding keys."""
+        offsets = array.array("Q", [0])
+        data = bytearray()
+        for key in keys:
+            data += key.encode("utf-8") if isinstance(key, str) else key
+            offsets.append(len(data))
+        count = len(offsets) - 1
+        offsets_size = len(offsets) * _OFFSET_SIZE
+        # Shared memory blocks cannot be empty.
+        shm = shared_memory.SharedMemory(
+            create=True, size=max(1, offsets_size + len(data))
+        )
+        shm.buf[:offsets_size] = offsets.tobytes()
+        shm.buf[offsets_size : offsets_size + len(data)] = data
+        return cls(shm, count)
+
+    @classmethod
+    def attach(cls, name: str, count: int) -> "KxKeyArena":
+        """Attaches to the arena of count keys in the block with this name."""
+        try:
+            # The creator unlinks the block, not the processes attaching.
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Before Python 3.13.
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, count)
+
+    def __reduce__(self) -> t.Tuple:
+        return (KxKeyArena.attach, (self.name, self._count))
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index: int) -> str:
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("arena index out of range")
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return str(self._data[start:end], "utf-8")
+
+    def __iter__(self) -> t.Iterator[str]:
+        for i in range(self._count):
+            yield self[i]
+
+    def filter_range(
+        self, kx_pattern: KxPattern, start: int = 0, stop: t.Optional[int] = None
+    ) -> "array.array[int]":
+        """Returns the indices of the keys in [start, stop) that full-match."""
+        if stop is None or stop > self._count:
+            stop = self._count
+        return _filter_range(kx_pattern, self._data, self._offsets, start, stop)
+
+    def close(self) -> None:
+        """Detaches this process from the arena."""
+        self._offsets.release()
+        self._data.release()
+        self._shm.close()
+
+    def unlink(self) -> None:
+        """Frees the shared memory block, once every process has closed it."""
+        self._shm.unlink()
+
+    def __enter__(self) -> "KxKeyArena":
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        self.close()
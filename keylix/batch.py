@@ -0,0 +1,215 @@
+"""Vectorized matching of whole key columns with NumPy.
+
+Every node is evaluated once per batch instead of once per key: Chars
+patterns use numpy.char, OR-, AND- and EXCLUDES-patterns combine the arrays
+of their sub-patterns. Concat-patterns of characters and wildcards are
+searched, and prefiltered for full matches, with numpy.char; keys that
+pass the prefilter, and shapes that cannot be vectorized, are verified
+with the reference implementation.
+
+NumPy is an optional dependency of keylix.
+"""
+
+import typing as t
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternWildcard,
+    _unwrap,
+)
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+# Start and end offsets stored for keys without a match.
+NO_MATCH = -1
+
+
+def _as_key_array(keys: t.Any) -> "np.ndarray":
+    if np is None:
+        raise ImportError("keylix batch matching requires numpy.")
+    return np.asarray(keys, dtype=str)
+
+
+def _verify(
+    kx_pattern: KxPattern, keys: "np.ndarray", mask: "np.ndarray"
+) -> "np.ndarray":
+    # Runs the reference full_match() on the keys still selected by mask.
+    indices = np.flatnonzero(mask)
+    mask[indices] = [kx_pattern.full_match(str(keys[i])) for i in indices]
+    return mask
+
+
+def _glob_literals(
+    kx_pattern: KxPatternConcat,
+) -> t.Union[t.List[t.Optional[str]], None]:
+    # Returns the characters of a concat-pattern made of characters and
+    # wildcards, with None for each wildcard, or None for other shapes.
+    literals = []
+    for sub_pattern in kx_pattern._sub_patterns:
+        sub_pattern = _unwrap(sub_pattern)
+        if isinstance(sub_pattern, KxPatternWildcard):
+            literals.append(None)
+        elif isinstance(sub_pattern, KxPatternChars):
+            literals.append(sub_pattern._pattern)
+        else:
+            return None
+    return literals
+
+
+def _glob_search(
+    literals: t.List[t.Optional[str]], keys: "np.ndarray"
+) -> t.Tuple["np.ndarray", "np.ndarray"]:
+    # The leftmost-shortest match of a glob starts at the first occurrence
+    # of the characters before its first wildcard, at 0 if there are none.
+    # Each later run of characters follows a wildcard, and ends the match
+    # soonest at its first occurrence after the previous run.
+    runs = [""]
+    for literal in literals:
+        if literal is None:
+            runs.append("")
+        else:
+            runs[-1] += literal
+    starts = np.char.find(keys, runs[0]).astype(np.int64)
+    found = starts != NO_MATCH
+    ends = np.where(found, starts + len(runs[0]), 0)
+    for run in runs[1:]:
+        if run != "":
+            run_starts = np.char.find(keys, run, ends)
+            found &= run_starts != NO_MATCH
+            ends = np.where(found, run_starts + len(run), 0)
+    return np.where(found, starts, NO_MATCH), np.where(found, ends, NO_MATCH)
+
+
+def _search(
+    kx_pattern: KxPattern, keys: "np.ndarray", lengths: "np.ndarray"
+) -> t.Tuple["np.ndarray", "np.ndarray"]:
+    kx_pattern = _unwrap(kx_pattern)
+    if isinstance(kx_pattern, KxPatternWildcard):
+        return np.zeros(len(keys), dtype=np.int64), np.zeros(len(keys), dtype=np.int64)
+    if isinstance(kx_pattern, KxPatternChars):
+        starts = np.char.find(keys, kx_pattern._pattern).astype(np.int64)
+        ends = np.where(starts == NO_MATCH, NO_MATCH, starts + len(kx_pattern._pattern))
+        return starts, ends
+    if isinstance(kx_pattern, KxPatternOr):
+        # The first sub-pattern that is found gives the match.
+        starts = np.full(len(keys), NO_MATCH, dtype=np.int64)
+        ends = np.full(len(keys), NO_MATCH, dtype=np.int64)
+        for sub_pattern in kx_pattern._sub_patterns:
+            sub_starts, sub_ends = _search(sub_pattern, keys, lengths)
+            take = (starts == NO_MATCH) & (sub_starts != NO_MATCH)
+            starts[take] = sub_starts[take]
+            ends[take] = sub_ends[take]
+        return starts, ends
+    if isinstance(kx_pattern, KxPatternAnd):
+        starts = lengths + 1
+        ends = np.full(len(keys), -1, dtype=np.int64)
+        found = np.ones(len(keys), dtype=bool)
+        for sub_pattern in kx_pattern._sub_patterns:
+            sub_starts, sub_ends = _search(sub_pattern, keys, lengths)
+            found &= sub_starts != NO_MATCH
+            starts = np.minimum(starts, sub_starts)
+            ends = np.maximum(ends, sub_ends)
+        starts = np.where(found, starts, NO_MATCH)
+        ends = np.where(found, ends, NO_MATCH)
+        return starts, ends
+    if isinstance(kx_pattern, KxPatternExcludes):
+        sub_starts, sub_ends = _search(kx_pattern._sub_pattern, keys, lengths)
+        found = (sub_starts == NO_MATCH) | (sub_ends > 0)
+        starts = np.where(found, 0, NO_MATCH)
+        return starts, starts.copy()
+    if isinstance(kx_pattern, KxPatternConcat):
+        literals = _glob_literals(kx_pattern)
+        if literals is not None:
+            return _glob_search(literals, keys)
+
+    starts = np.full(len(keys), NO_MATCH, dtype=np.int64)
+    ends = np.full(len(keys), NO_MATCH, dtype=np.int64)
+    for i, key in enumerate(keys):
+        kx_match = kx_pattern.search(str(key))
+        if kx_match is not None:
+            starts[i] = kx_match.start
+            ends[i] = kx_match.end
+    return starts, ends
+
+
+def _glob_mask(
+    kx_pattern: KxPatternConcat, keys: "np.ndarray", lengths: "np.ndarray"
+) -> t.Union["np.ndarray", None]:
+    # Handles concat-patterns of characters and wildcards. Returns None for
+    # other shapes.
+    literals = _glob_literals(kx_pattern)
+    if literals is None:
+        return None
+    wildcards = [i for i, literal in enumerate(literals) if literal is None]
+    if len(wildcards) == 0:
+        return keys == "".join(literals)
+
+    prefix = "".join(literals[: wildcards[0]])
+    suffix = "".join(literals[wildcards[-1] + 1 :])
+    infixes = [literal for literal in literals[wildcards[0] : wildcards[-1]] if literal]
+    mask = lengths >= len(prefix) + len(suffix) + sum(map(len, infixes))
+    if prefix:
+        mask &= np.char.startswith(keys, prefix)
+    if suffix:
+        mask &= np.char.endswith(keys, suffix)
+    if len(infixes) > 0:
+        for infix in infixes:
+            mask &= np.char.find(keys, infix) != NO_MATCH
+        mask = _verify(kx_pattern, keys, mask)
+    return mask
+
+
+def _full_match(
+    kx_pattern: KxPattern, keys: "np.ndarray", lengths: "np.ndarray"
+) -> "np.ndarray":
+    kx_pattern = _unwrap(kx_pattern)
+    if isinstance(kx_pattern, KxPatternWildcard):
+        return np.ones(len(keys), dtype=bool)
+    if isinstance(kx_pattern, KxPatternChars):
+        return keys == kx_pattern._pattern
+    if isinstance(kx_pattern, KxPatternOr):
+        mask = np.zeros(len(keys), dtype=bool)
+        for sub_pattern in kx_pattern._sub_patterns:
+            mask |= _full_match(sub_pattern, keys, lengths)
+        return mask
+    if isinstance(kx_pattern, KxPatternAnd):
+        starts, _ = _search(kx_pattern, keys, lengths)
+        return starts == 0
+    if isinstance(kx_pattern, KxPatternExcludes):
+        starts, _ = _search(kx_pattern._sub_pattern, keys, lengths)
+        return starts == NO_MATCH
+    if isinstance(kx_pattern, KxPatternConcat):
+        mask = _glob_mask(kx_pattern, keys, lengths)
+        if mask is not None:
+            return mask
+    return _verify(kx_pattern, keys, np.ones(len(keys), dtype=bool))
+
+
+def full_match_mask(kx_pattern: KxPattern, keys: t.Any) -> "np.ndarray":
+    """Returns a boolean mask of the keys that full-match kx_pattern.
+
+    keys can be any sequence of strings or a NumPy string array.
+    """
+    keys = _as_key_array(keys)
+    lengths = np.char.str_len(keys).astype(np.int64)
+    return _full_match(kx_pattern, keys, lengths)
+
+
+def search_arrays(
+    kx_pattern: KxPattern, keys: t.Any
+) -> t.Tuple["np.ndarray", "np.ndarray"]:
+    """Returns the start and end arrays of kx_pattern.search() over keys.
+
+    Keys without a match have both offsets set to NO_MATCH.
+    """
+    keys = _as_key_array(keys)
+    lengths = np.char.str_len(keys).astype(np.int64)
+    return _search(kx_pattern, keys, lengths)
@@ -0,0 +1,111 @@
+"""Bounded LRU caches of match results."""
+
+import collections
+import typing as t
+
+from keylix.core import KxPattern, KxString
+
+DEFAULT_CACHE_SIZE = 100000
+
+
+class KxCacheInfo(t.NamedTuple):
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+class KxCachedPattern:
+    """Memoizes full_match() and contains_match() of kx_pattern per key.
+
+    The results of both methods share one cache of at most maxsize
+    entries, which evicts the least recently used one. Only whole str and
+    bytes keys are cached; calls with pos or endpos, or with mutable keys,
+    are passed through.
+    """
+
+    _kx_pattern: KxPattern
+    _maxsize: int
+    # Keyed by the method name and the key.
+    _results: "collections.OrderedDict[t.Tuple[str, KxString], bool]"
+    _hits: int
+    _misses: int
+    _evictions: int
+
+    def __init__(self, kx_pattern: KxPattern, maxsize: int = DEFAULT_CACHE_SIZE):
+        if maxsize < 1:
+            raise ValueError("maxsize must be positive.")
+        self._kx_pattern = kx_pattern
+        self._maxsize = maxsize
+        self._results = collections.OrderedDict()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __reduce__(self) -> t.Tuple:
+        # Worker processes start with an empty cache.
+        return (KxCachedPattern, (self._kx_pattern, self._maxsize))
+
+    @property
+    def kx_pattern(self) -> KxPattern:
+        return self._kx_pattern
+
+    def _lookup(
+        self,
+        name: str,
+        method: t.Callable[..., bool],
+        string: KxString,
+        pos: int,
+        endpos: t.Optional[int],
+    ) -> bool:
+        if pos != 0 or endpos is not None or not isinstance(string, (str, bytes)):
+            return method(string, pos, endpos)
+        results = self._results
+        key = (name, string)
+        result = results.get(key)
+        if result is not None:
+            self._hits += 1
+            results.move_to_end(key)
+            return result
+        self._misses += 1
+        result = method(string)
+        results[key] = result
+        if len(results) > self._maxsize:
+            results.popitem(last=False)
+            self._evictions += 1
+        return result
+
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        return self._lookup(
+            "full_match", self._kx_pattern.full_match, string, pos, endpos
+        )
+
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        return self._lookup(
+            "contains_match",
+            self._kx_pattern.contains_match,
+            string,
+            pos,
+            endpos,
+        )
+
+    def cache_info(self) -> KxCacheInfo:
+        return KxCacheInfo(
+            self._hits,
+            self._misses,
+            self._evictions,
+            self._maxsize,
+            len(self._results),
+        )
+
+    def cache_clear(self) -> None:
+        """Drops the cached results and resets the statistics."""
+        self._results.clear()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
@@ -0,0 +1,214 @@
+"""Generated Python matcher functions for pattern trees.
+
+A pattern tree is translated into the source of one function that returns
+kx_pattern.full_match(s) for a str key s, then compiled with exec(). Each
+node becomes a boolean expression, in one of three modes: the key matches
+the node ("full"), search() finds the node in the key ("found"), or finds
+it at the start of the key ("start"). Characters become == / in /
+startswith tests, concat-patterns made of characters and wildcards become
+startswith/endswith/find chains, and OR-, AND- and EXCLUDES-patterns
+become boolean operators. Shapes without such an expression call the
+node's own methods.
+"""
+
+import typing as t
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternWildcard,
+    _is_chars,
+    _unwrap,
+)
+
+_FULL = "full"
+_FOUND = "found"
+_START = "start"
+
+# Marks a wildcard in the items of a glob.
+_WILDCARD = None
+
+
+def _glob_items(kx_pattern: KxPattern) -> t.Union[t.List[t.Optional[str]], None]:
+    # Returns the characters and wildcards of a concat-pattern made only of
+    # them, or None.
+    items = []
+    for sub_pattern in kx_pattern._sub_patterns:
+        sub_pattern = _unwrap(sub_pattern)
+        if isinstance(sub_pattern, KxPatternChars):
+            items.append(sub_pattern._pattern)
+        elif isinstance(sub_pattern, KxPatternWildcard):
+            items.append(_WILDCARD)
+        else:
+            return None
+    return items
+
+
+class _Generator:
+    _namespace: t.Dict[str, t.Any]
+    _helpers: t.List[str]
+
+    def __init__(self):
+        self._namespace = {}
+        self._helpers = []
+
+    def _constant(self, value: t.Any) -> str:
+        name = f"_c{len(self._namespace)}"
+        self._namespace[name] = value
+        return name
+
+    def _fallback(self, kx_pattern: KxPattern, mode: str) -> str:
+        node = self._constant(kx_pattern)
+        if mode == _FULL:
+            return f"{node}.full_match(s)"
+        if mode == _FOUND:
+            return f"{node}.contains_match(s)"
+        if isinstance(kx_pattern, KxPatternConcat):
+            return f"len({node}.full_match_ends(s, 0, len(s))) > 0"
+        return f"_starts_at_0({node}.search(s))"
+
+    def _glob(self, items: t.List[t.Optional[str]], mode: str) -> str:
+        if mode != _FULL:
+            items = items + [_WILDCARD]
+        if mode == _FOUND:
+            items = [_WILDCARD] + items
+        # Merges adjacent characters and wildcards.
+        merged = []
+        for item in items:
+            if item == "":
+                continue
+            if len(merged) > 0 and (item is _WILDCARD) == (merged[-1] is _WILDCARD):
+                if item is not _WILDCARD:
+                    merged[-1] += item
+                continue
+            merged.append(item)
+        if len(merged) == 0:
+            return "s == ''"
+        if _WILDCARD not in merged:
+            return f"s == {merged[0]!r}"
+        prefix = merged.pop(0) if merged[0] is not _WILDCARD else ""
+        suffix = merged.pop() if merged[-1] is not _WILDCARD else ""
+        middles = [item for item in merged if item is not _WILDCARD]
+
+        tests = []
+        min_length = len(prefix) + len(suffix) + sum(map(len, middles))
+        if min_length > 0:
+            tests.append(f"len(s) >= {min_length}")
+        if prefix != "":
+            tests.append(f"s.startswith({prefix!r})")
+        if suffix != "":
+            tests.append(f"s.endswith({suffix!r})")
+        end = f"len(s) - {len(suffix)}" if suffix != "" else "len(s)"
+        if len(middles) == 1:
+            if prefix == "" and suffix == "":
+                tests.append(f"{middles[0]!r} in s")
+            else:
+                tests.append(f"s.find({middles[0]!r}, {len(prefix)}, {end}) >= 0")
+        elif len(middles) > 1:
+            # Finds the middle characters from left to right, each as early as
+            # possible.
+            name = f"_g{len(self._helpers)}"
+            lines = [f"def {name}(s):", f"    i = {len(prefix)}", f"    end = {end}"]
+            for middle in middles:
+                lines += [
+                    f"    i = s.find({middle!r}, i, end)",
+                    "    if i < 0:",
+                    "        return False",
+                    f"    i += {len(middle)}",
+                ]
+            lines.append("    return True")
+            self._helpers.append("\n".join(lines))
+            tests.append(f"{name}(s)")
+        if len(tests) == 0:
+            return "True"
+        return " and ".join(tests)
+
+    def expression(self, kx_pattern: KxPattern, mode: str) -> str:
+        kx_pattern = _unwrap(kx_pattern)
+        if isinstance(kx_pattern, KxPatternWildcard):
+            return "True"
+        if isinstance(kx_pattern, KxPatternChars):
+            return self._glob([kx_pattern._pattern], mode)
+        if isinstance(kx_pattern, KxPatternConcat):
+            items = _glob_items(kx_pattern)
+            if items is None:
+                return self._fallback(kx_pattern, mode)
+            return self._glob(items, mode)
+        if isinstance(kx_pattern, KxPatternOr):
+            sub_patterns = [_unwrap(sub) for sub in kx_pattern._sub_patterns]
+            if mode == _START:
+                # search() returns the match of the first sub-pattern found.
+                return self._fallback(kx_pattern, mode)
+            if len(sub_patterns) == 0:
+                return "False"
+            if mode == _FULL and all(_is_chars(sub) for sub in sub_patterns):
+                literals = frozenset(sub._pattern for sub in sub_patterns)
+                return f"s in {self._constant(literals)}"
+            return self._any([self.expression(sub, mode) for sub in sub_patterns])
+        if isinstance(kx_pattern, KxPatternAnd):
+            sub_patterns = kx_pattern._sub_patterns
+            found = self._all([self.expression(sub, _FOUND) for sub in sub_patterns])
+            if mode == _FOUND:
+                return found
+            # The match starts at the earliest start of the sub-patterns.
+            start = self._any([self.expression(sub, _START) for sub in sub_patterns])
+            return self._all([found, start])
+        if isinstance(kx_pattern, KxPatternExcludes):
+            if mode == _FULL:
+                return f"not ({self.expression(kx_pattern._sub_pattern, _FOUND)})"
+            # search() finds an EXCLUDES-pattern, at the start, unless the
+            # sub-pattern has a match ending there, which for characters and
+            # wildcards only depends on whether they match "".
+            sub_pattern = _unwrap(kx_pattern._sub_pattern)
+            if (
+                _is_chars(sub_pattern)
+                or isinstance(sub_pattern, KxPatternWildcard)
+                or isinstance(sub_pattern, KxPatternConcat)
+                and _glob_items(sub_pattern) is not None
+            ):
+                return str(not sub_pattern.full_match(""))
+            return self._fallback(kx_pattern, _FOUND)
+        return self._fallback(kx_pattern, mode)
+
+    @staticmethod
+    def _any(expressions: t.List[str]) -> str:
+        if len(expressions) == 0:
+            return "False"
+        return " or ".join(f"({expression})" for expression in expressions)
+
+    @staticmethod
+    def _all(expressions: t.List[str]) -> str:
+        if len(expressions) == 0:
+            return "True"
+        return " and ".join(f"({expression})" for expression in expressions)
+
+    def source(self, kx_pattern: KxPattern) -> str:
+        body = self.expression(kx_pattern, _FULL)
+        return "\n\n".join(
+            self._helpers + [f"def full_match(s):\n    return bool({body})"]
+        )
+
+    def namespace(self) -> t.Dict[str, t.Any]:
+        return dict(self._namespace, _starts_at_0=_starts_at_0)
+
+
+def _starts_at_0(kx_match: t.Any) -> bool:
+    return kx_match is not None and kx_match.start == 0
+
+
+def generate_source(kx_pattern: KxPattern) -> str:
+    """Returns the source of the matcher function of kx_pattern."""
+    return _Generator().source(kx_pattern.optimize())
+
+
+def compile_function(kx_pattern: KxPattern) -> t.Callable[[str], bool]:
+    """Returns a function equivalent to kx_pattern.full_match() for str keys."""
+    generator = _Generator()
+    source = generator.source(kx_pattern.optimize())
+    namespace = generator.namespace()
+    exec(compile(source, f"<keylix {kx_pattern}>", "exec"), namespace)
+    return namespace["full_match"]
@@ -1,8 +1,27 @@
 import re
 import typing as t
 
+from keylix.ahocorasick import KxAhoCorasick
+
+# Keys can be strings or UTF-8 encoded bytes-like objects. Offsets of
+# matches in bytes-like keys are byte offsets.
+KxString = t.Union[str, bytes, bytearray, memoryview]
+
+# OR-patterns with at least TRIE_MIN_SUB_PATTERNS sub-patterns, all of them
+# characters, full-match keys by walking a trie of the characters. Scanning
+# keys for them with the Aho-Corasick automaton built on the trie is only
+# faster than one search per sub-pattern from AHO_CORASICK_MIN_SUB_PATTERNS.
+TRIE_MIN_SUB_PATTERNS = 4
+AHO_CORASICK_MIN_SUB_PATTERNS = 128
+
+# AND-patterns reorder their sub-patterns after this many calls, from the
+# rejects seen since the last reordering.
+AND_REORDER_INTERVAL = 1000
+
 
 class KxMatch:
+    __slots__ = ("start", "end")
+
     start: int
     end: int
 
@@ -11,72 +30,295 @@ class KxMatch:
         self.end = end
 
 
+def _endpos(string: KxString, endpos: t.Optional[int]) -> int:
+    if endpos is None or endpos > len(string):
+        return len(string)
+    return endpos
+
+
 class KxPattern:
-    def contains_match(self, string: str) -> bool:
-        if self.search(string) is not None:
+    # All matching methods work on string[pos:endpos] without copying it.
+    # Offsets of returned matches are relative to the start of string.
+
+    def optimize(self) -> "KxPattern":
+        """Returns an equivalent pattern tree with fewer nodes.
+
+        The tree is not modified; unchanged sub-trees are shared.
+        """
+        return self
+
+    def _cost(self) -> float:
+        """Returns a rough relative cost of matching the pattern."""
+        return 1.0
+
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        if self.search(string, pos, endpos) is not None:
             return True
         return False
 
-    def full_match(self, string: str) -> bool:
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
         return False
 
-    def search(self, string: str) -> t.Union[KxMatch, None]:
+    def full_match_ends(self, string: KxString, pos: int, endpos: int) -> t.Set[int]:
+        """Returns every end e in [pos, endpos] where string[pos:e] full-matches."""
+        return {
+            end for end in range(pos, endpos + 1) if self.full_match(string, pos, end)
+        }
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
         return None
 
-    def search_all(self, string: str) -> t.List:
-        result = []
-        i = 0
-        while i <= len(string):
-            kx_match = self.search(string[i:])
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        """Returns None if search() finds no match, else whether it starts at pos.
+
+        pos <= endpos <= len(string). Subclasses answer without building
+        KxMatch objects where they can.
+        """
+        kx_match = self.search(string, pos, endpos)
+        if kx_match is None:
+            return None
+        return kx_match.start == pos
+
+    def finditer(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Iterator[KxMatch]:
+        """Yields the matches found by searching from each start after the last one."""
+        endpos = _endpos(string, endpos)
+        while pos <= endpos:
+            kx_match = self.search(string, pos, endpos)
             if kx_match is None:
                 break
-            result.append(kx_match)
-            i += kx_match.start + 1
-        return result
+            yield kx_match
+            pos = kx_match.start + 1
+
+    def search_all(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.List[KxMatch]:
+        return list(self.finditer(string, pos, endpos))
+
+    def match_many(self, keys: t.Any) -> t.Any:
+        """Returns a NumPy boolean mask of the keys that full-match the pattern."""
+        from keylix.batch import full_match_mask
+
+        return full_match_mask(self, keys)
+
+    def search_many(self, keys: t.Any) -> t.Tuple[t.Any, t.Any]:
+        """Returns NumPy arrays of search() start and end offsets over keys."""
+        from keylix.batch import search_arrays
+
+        return search_arrays(self, keys)
+
+    def filter_arena(
+        self, arena: t.Any, start: int = 0, stop: t.Optional[int] = None
+    ) -> t.Any:
+        """Returns an array('Q') of the indices of the arena keys that full-match.
+
+        Only the keys with indices in [start, stop) are matched, in place.
+        """
+        return arena.filter_range(self, start, stop)
+
+    def cached(self, maxsize: t.Optional[int] = None) -> t.Any:
+        """Returns the KxCachedPattern attached to this pattern.
+
+        It is created on the first call, with maxsize (or the default size);
+        later calls return the same cache, so compile() users share it.
+        """
+        from keylix.cache import DEFAULT_CACHE_SIZE, KxCachedPattern
+
+        cached_pattern = getattr(self, "_cached_pattern", None)
+        if cached_pattern is None:
+            cached_pattern = KxCachedPattern(self, maxsize or DEFAULT_CACHE_SIZE)
+            self._cached_pattern = cached_pattern
+        return cached_pattern
+
+    def full_match_function(self) -> t.Callable[[str], bool]:
+        """Returns a generated function equivalent to full_match() for str keys.
+
+        The function is generated on the first call and kept on the pattern.
+        """
+        function = getattr(self, "_full_match_function", None)
+        if function is None:
+            from keylix.codegen import compile_function
+
+            function = compile_function(self)
+            self._full_match_function = function
+        return function
+
+    def bytes_regex(self) -> t.Optional[re.Pattern]:
+        """Returns a compiled regex equivalent to full_match() for UTF-8 keys.
+
+        Returns None if the pattern has no regex or its regex is too large,
+        see compile_bounded_regex(). The result is kept on the pattern.
+        """
+        try:
+            return self._bytes_regex
+        except AttributeError:
+            pass
+        from keylix.regex import compile_bounded_regex
+
+        self._bytes_regex: t.Optional[re.Pattern] = compile_bounded_regex(
+            self, as_bytes=True
+        )
+        return self._bytes_regex
+
+    def __getstate__(self) -> t.Dict[str, t.Any]:
+        # Generated functions and the wrappers of a running profiler cannot
+        # be pickled; workers generate their own and are not profiled. The
+        # compiled regex is left out too, it can be large.
+        from keylix.profiling import PROFILED_METHODS
+
+        state = self.__dict__.copy()
+        state.pop("_full_match_function", None)
+        state.pop("_bytes_regex", None)
+        for method in PROFILED_METHODS:
+            state.pop(method, None)
+        return state
+
+    def profile(self, callback: t.Optional[t.Callable] = None) -> t.Any:
+        """Returns a KxProfiler that counts the calls of every node of the tree.
+
+        Use it as a context manager; its report() is the statistics tree.
+        """
+        from keylix.profiling import KxProfiler
+
+        return KxProfiler(self, callback)
 
 
 class KxPatternWildcard(KxPattern):
     def __str__(self) -> str:
         return "*"
 
-    def full_match(self, string: str) -> bool:
+    def _cost(self) -> float:
+        return 0.5
+
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
         return True
 
-    def search(self, string: str) -> t.Union[KxMatch, None]:
-        return KxMatch(start=0, end=0)
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        return pos <= _endpos(string, endpos)
+
+    def full_match_ends(self, string: KxString, pos: int, endpos: int) -> t.Set[int]:
+        return set(range(pos, endpos + 1))
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        if pos > _endpos(string, endpos):
+            return None
+        return KxMatch(start=pos, end=pos)
+
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        return True
 
 
 class KxPatternChars(KxPattern):
 
     _pattern: str
-    _re_pattern: re.Pattern
+    _re_pattern: t.Union[re.Pattern, None]
+    _re_bytes_pattern: t.Union[re.Pattern, None]
 
     def __init__(self, pattern: str):
         super().__init__()
         self._pattern = pattern
-        self._re_pattern = re.compile(re.escape(pattern))
+        self._re_pattern = None
+        self._re_bytes_pattern = None
+
+    def _get_re_pattern(self, string: KxString) -> re.Pattern:
+        # The regexes are compiled on first use by search(), for str and
+        # bytes-like keys separately.
+        if isinstance(string, str):
+            if self._re_pattern is None:
+                self._re_pattern = re.compile(re.escape(self._pattern))
+            return self._re_pattern
+        if self._re_bytes_pattern is None:
+            self._re_bytes_pattern = re.compile(
+                re.escape(self._pattern.encode("utf-8"))
+            )
+        return self._re_bytes_pattern
 
     def __str__(self) -> str:
         return f"chars({self._pattern})"
 
-    def full_match(self, string: str) -> bool:
-        kx_match = self.search(string)
-        if kx_match is not None and kx_match.start == 0 and kx_match.end == len(string):
-            return True
-        return False
-
-    def search(self, string: str) -> t.Union[KxMatch, None]:
-        re_match = self._re_pattern.search(string)
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return False
+        if not isinstance(string, str):
+            re_pattern = self._get_re_pattern(string)
+            return re_pattern.fullmatch(string, pos, endpos) is not None
+        return endpos - pos == len(self._pattern) and string.startswith(
+            self._pattern, pos
+        )
+
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        if not isinstance(string, str):
+            re_pattern = self._get_re_pattern(string)
+            return re_pattern.search(string, pos, endpos) is not None
+        # Like re, positions past the end of string start at its end.
+        return string.find(self._pattern, min(pos, len(string)), endpos) != -1
+
+    def full_match_ends(self, string: KxString, pos: int, endpos: int) -> t.Set[int]:
+        if not isinstance(string, str):
+            re_match = self._get_re_pattern(string).match(string, pos, endpos)
+            return set() if re_match is None else {re_match.end()}
+        end = pos + len(self._pattern)
+        if end <= endpos and string.startswith(self._pattern, pos):
+            return {end}
+        return set()
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        re_pattern = self._get_re_pattern(string)
+        re_match = re_pattern.search(string, pos, _endpos(string, endpos))
         if re_match is not None:
             return KxMatch(start=re_match.start(), end=re_match.end())
         return None
 
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        if not isinstance(string, str):
+            return super()._found_at(string, pos, endpos)
+        if pos + len(self._pattern) <= endpos and string.startswith(self._pattern, pos):
+            return True
+        if string.find(self._pattern, pos, endpos) != -1:
+            return False
+        return None
+
 
 class KxPatternEmpty(KxPatternChars):
     def __init__(self):
         super().__init__("")
 
 
+def _is_chars(kx_pattern: t.Union[KxPattern, None]) -> bool:
+    return isinstance(kx_pattern, KxPatternChars)
+
+
+def _is_empty(kx_pattern: KxPattern) -> bool:
+    return isinstance(kx_pattern, KxPatternChars) and kx_pattern._pattern == ""
+
+
+def _unwrap(kx_pattern: KxPattern) -> KxPattern:
+    while isinstance(kx_pattern, KxPatternParentheses):
+        kx_pattern = kx_pattern._sub_pattern
+    return kx_pattern
+
+
 class KxPatternParentheses(KxPattern):
 
     _sub_pattern: KxPattern
@@ -85,14 +327,35 @@ class KxPatternParentheses(KxPattern):
         super().__init__()
         self._sub_pattern = sub_pattern
 
-    def contains_match(self, string: str) -> bool:
-        return self._sub_pattern.contains_match(string)
+    def __str__(self) -> str:
+        return f"( {self._sub_pattern} )"
+
+    def optimize(self) -> KxPattern:
+        return self._sub_pattern.optimize()
+
+    def _cost(self) -> float:
+        return self._sub_pattern._cost()
 
-    def full_match(self, string: str) -> bool:
-        return self._sub_pattern.full_match(string)
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        return self._sub_pattern.contains_match(string, pos, endpos)
 
-    def search(self, string: str) -> t.Union[KxMatch, None]:
-        return self._sub_pattern.search(str)
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        return self._sub_pattern.full_match(string, pos, endpos)
+
+    def full_match_ends(self, string: KxString, pos: int, endpos: int) -> t.Set[int]:
+        return self._sub_pattern.full_match_ends(string, pos, endpos)
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        return self._sub_pattern.search(string, pos, endpos)
+
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        return self._sub_pattern._found_at(string, pos, endpos)
 
 
 class KxPatternExcludes(KxPattern):
@@ -106,31 +369,65 @@ class KxPatternExcludes(KxPattern):
     def __str__(self) -> str:
         return f"~({self._sub_pattern})"
 
-    def contains_match(self, string: str) -> bool:
-        kx_match = self._sub_pattern.search(str)
-
-        return super().contains_match(string)
-
-    def full_match(self, string: str) -> bool:
-        kx_match = self._sub_pattern.search(string)
-        if kx_match is None:
-            return True
-        return False
-
-    def search(self, string: str) -> t.Union[KxMatch, None]:
-        kx_match = self._sub_pattern.search(string)
-        if kx_match is None or kx_match.end > 0:
-            return KxMatch(start=0, end=0)
+    def optimize(self) -> KxPattern:
+        return KxPatternExcludes(self._sub_pattern.optimize())
+
+    def _cost(self) -> float:
+        return 1.0 + self._sub_pattern._cost()
+
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        return not self._sub_pattern.contains_match(string, pos, endpos)
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        if pos > _endpos(string, endpos):
+            return None
+        kx_match = self._sub_pattern.search(string, pos, endpos)
+        if kx_match is None or kx_match.end > pos:
+            return KxMatch(start=pos, end=pos)
         return None
 
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        sub_pattern = _unwrap(self._sub_pattern)
+        if isinstance(
+            sub_pattern, (KxPatternChars, KxPatternWildcard, KxPatternConcat)
+        ):
+            # Their leftmost-shortest match ends at pos iff they match "" there.
+            return None if sub_pattern.full_match(string, pos, pos) else True
+        return super()._found_at(string, pos, endpos)
+
 
 class KxPatternOr(KxPattern):
 
     _sub_patterns: t.List[KxPattern]
+    _literals: t.Union[t.List[str], None]
+    _automaton: t.Union[KxAhoCorasick, None]
 
     def __init__(self, sub_patterns: t.List[KxPattern]):
         super().__init__()
         self._sub_patterns = sub_patterns
+        self._literals = None
+        self._automaton = None
+        if len(sub_patterns) >= TRIE_MIN_SUB_PATTERNS and all(
+            isinstance(sub_pattern, KxPatternChars) for sub_pattern in sub_patterns
+        ):
+            self._literals = [sub_pattern._pattern for sub_pattern in sub_patterns]
+
+    def _get_automaton(self, string: KxString) -> t.Union[KxAhoCorasick, None]:
+        # The automaton is built on first use, and for str keys only.
+        if self._literals is None or not isinstance(string, str):
+            return None
+        if self._automaton is None:
+            self._automaton = KxAhoCorasick(self._literals)
+        return self._automaton
+
+    def _get_search_automaton(self, string: KxString) -> t.Union[KxAhoCorasick, None]:
+        if len(self._sub_patterns) < AHO_CORASICK_MIN_SUB_PATTERNS:
+            return None
+        return self._get_automaton(string)
 
     def __str__(self) -> str:
         if len(self._sub_patterns) == 0:
@@ -141,41 +438,197 @@ class KxPatternOr(KxPattern):
         r += " )"
         return r
 
-    def full_match(self, string: str) -> bool:
+    def optimize(self) -> KxPattern:
+        sub_patterns = []
+        for sub_pattern in self._sub_patterns:
+            sub_pattern = sub_pattern.optimize()
+            if isinstance(sub_pattern, KxPatternOr):
+                sub_patterns.extend(sub_pattern._sub_patterns)
+            else:
+                sub_patterns.append(sub_pattern)
+        # A wildcard matches every string, and search() returns its match
+        # before trying the sub-patterns that follow it.
+        for i, sub_pattern in enumerate(sub_patterns):
+            if isinstance(sub_pattern, KxPatternWildcard):
+                sub_patterns = sub_patterns[: i + 1]
+                break
+        if len(sub_patterns) == 1:
+            return sub_patterns[0]
+        return KxPatternOr(sub_patterns)
+
+    def _cost(self) -> float:
+        if (
+            self._literals is not None
+            and len(self._sub_patterns) >= AHO_CORASICK_MIN_SUB_PATTERNS
+        ):
+            return 2.0
+        return 1.0 + sum(sub_pattern._cost() for sub_pattern in self._sub_patterns)
+
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        automaton = self._get_automaton(string)
+        if automaton is not None:
+            return automaton.full_match(string, pos, _endpos(string, endpos))
         for sub_pattern in self._sub_patterns:
-            if sub_pattern.full_match(string):
+            if sub_pattern.full_match(string, pos, endpos):
                 return True
         return False
 
-    def search(self, string: str) -> t.Union[KxMatch, None]:
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        automaton = self._get_search_automaton(string)
+        if automaton is not None:
+            return automaton.find_any(string, pos, _endpos(string, endpos))
         for sub_pattern in self._sub_patterns:
-            kx_match = sub_pattern.search(string)
+            if sub_pattern.contains_match(string, pos, endpos):
+                return True
+        return False
+
+    def full_match_ends(self, string: KxString, pos: int, endpos: int) -> t.Set[int]:
+        automaton = self._get_automaton(string)
+        if automaton is not None:
+            return automaton.prefix_ends(string, pos, endpos)
+        ends = set()
+        for sub_pattern in self._sub_patterns:
+            ends |= sub_pattern.full_match_ends(string, pos, endpos)
+        return ends
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        automaton = self._get_search_automaton(string)
+        if automaton is not None:
+            # The first sub-pattern that is found gives the match.
+            result = automaton.search_first(string, pos, _endpos(string, endpos))
+            if result is None:
+                return None
+            return KxMatch(start=result[1], end=result[2])
+        for sub_pattern in self._sub_patterns:
+            kx_match = sub_pattern.search(string, pos, endpos)
             if kx_match is not None:
                 return kx_match
         return None
 
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        if self._get_search_automaton(string) is not None:
+            return super()._found_at(string, pos, endpos)
+        for sub_pattern in self._sub_patterns:
+            found_at = sub_pattern._found_at(string, pos, endpos)
+            if found_at is not None:
+                return found_at
+        return None
+
 
 class KxPatternAnd(KxPattern):
+    # Every sub-pattern must be found, so the order in which they are tried
+    # only decides how soon a rejected key is given up on. They start in
+    # order of static cost and are reordered by observed reject rates.
 
     _sub_patterns: t.List[KxPattern]
+    _costs: t.Dict[KxPattern, float]
+    _ordered: t.List[KxPattern]
+    _calls: int
+    _rejects: t.Dict[KxPattern, int]
 
     def __init__(self, sub_patterns: t.List[KxPattern]):
         super().__init__()
         self._sub_patterns = sub_patterns
+        self._costs = {sub_pattern: sub_pattern._cost() for sub_pattern in sub_patterns}
+        self._ordered = sorted(sub_patterns, key=self._costs.__getitem__)
+        self._calls = 0
+        self._rejects = {}
+
+    def _reject(self, sub_pattern: KxPattern) -> None:
+        self._rejects[sub_pattern] = self._rejects.get(sub_pattern, 0) + 1
+
+    def _reorder(self) -> None:
+        # Tries first the sub-patterns with the lowest cost per reject. A
+        # sub-pattern was evaluated in every call not rejected before it.
+        ranks = {}
+        evaluated = self._calls
+        for sub_pattern in self._ordered:
+            rejects = self._rejects.get(sub_pattern, 0)
+            reject_rate = (rejects + 1) / (evaluated + 2)
+            ranks[sub_pattern] = self._costs[sub_pattern] / reject_rate
+            evaluated -= rejects
+        self._ordered = sorted(self._ordered, key=ranks.__getitem__)
+        self._calls = 0
+        self._rejects = {}
+
+    def _count_call(self) -> None:
+        self._calls += 1
+        if self._calls >= AND_REORDER_INTERVAL:
+            self._reorder()
 
-    def full_match(self, string: str) -> bool:
-        kx_match = self.search(string)
-        if kx_match is not None and kx_match.start == 0:
-            return True
-        return False
+    def __str__(self) -> str:
+        if len(self._sub_patterns) == 0:
+            return "and()"
+        r = f"( {self._sub_patterns[0]}"
+        for sub_pattern in self._sub_patterns[1:]:
+            r += f"& {sub_pattern}"
+        r += " )"
+        return r
 
-    def search(self, string: str) -> t.Union[KxMatch, None]:
-        start = len(string) + 1
-        end = -1
-        print(f"len: {len(self._sub_patterns)}")
+    def optimize(self) -> KxPattern:
+        sub_patterns = []
         for sub_pattern in self._sub_patterns:
-            kx_match = sub_pattern.search(string)
+            sub_pattern = sub_pattern.optimize()
+            if isinstance(sub_pattern, KxPatternAnd):
+                sub_patterns.extend(sub_pattern._sub_patterns)
+            else:
+                sub_patterns.append(sub_pattern)
+        # Empty patterns only make a match start at the search position. One
+        # of them is enough, and none is needed next to a wildcard or an
+        # EXCLUDES-pattern, which also match there.
+        empty_patterns = [sub for sub in sub_patterns if _is_empty(sub)]
+        if len(empty_patterns) > 0:
+            sub_patterns = [sub for sub in sub_patterns if not _is_empty(sub)]
+            if not any(
+                isinstance(sub, (KxPatternWildcard, KxPatternExcludes))
+                for sub in sub_patterns
+            ):
+                sub_patterns.append(empty_patterns[0])
+        return KxPatternAnd(sub_patterns)
+
+    def _cost(self) -> float:
+        return 1.0 + sum(self._costs[sub] for sub in self._sub_patterns)
+
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return False
+        return self._found_at(string, pos, endpos) is True
+
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return False
+        self._count_call()
+        for sub_pattern in self._ordered:
+            if not sub_pattern.contains_match(string, pos, endpos):
+                self._reject(sub_pattern)
+                return False
+        return True
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return None
+        self._count_call()
+        start = endpos + 1
+        end = pos - 1
+        for sub_pattern in self._ordered:
+            kx_match = sub_pattern.search(string, pos, endpos)
             if kx_match is None:
+                self._reject(sub_pattern)
                 return None
             if kx_match.start < start:
                 start = kx_match.start
@@ -183,6 +636,20 @@ class KxPatternAnd(KxPattern):
                 end = kx_match.end
         return KxMatch(start, end)
 
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        # Every sub-pattern must be found, and the match starts at the
+        # earliest of their starts.
+        self._count_call()
+        at_pos = False
+        for sub_pattern in self._ordered:
+            found_at = sub_pattern._found_at(string, pos, endpos)
+            if found_at is None:
+                self._reject(sub_pattern)
+                return None
+            if found_at:
+                at_pos = True
+        return at_pos
+
 
 class KxPatternConcat(KxPattern):
     _sub_patterns: t.List[KxPattern]
@@ -200,38 +667,118 @@ class KxPatternConcat(KxPattern):
         r += " )"
         return r
 
-    def search(self, string: str) -> t.Union[KxMatch, None]:
-        n = len(self._sub_patterns)
-        m = len(string)
-        c = [[None for j in range(m + 1)] for i in range(n + 1)]
-        for j in range(m + 1):
-            c[0][j] = j
-        for i in range(1, n):
-            for j in range(m + 1):
-                for k in range(j + 1):
-                    if c[i - 1][k] is not None and self._sub_patterns[i - 1].full_match(
-                        string[k:j]
-                    ):
-                        c[i][j] = c[i - 1][k]
-                        break
-        for j in range(0, m):
-            if c[n][j] is not None:
-                return KxMatch(start=c[n][j], end=j)
+    def optimize(self) -> KxPattern:
+        sub_patterns = []
+        for sub_pattern in self._sub_patterns:
+            sub_pattern = sub_pattern.optimize()
+            if isinstance(sub_pattern, KxPatternConcat):
+                new_sub_patterns = sub_pattern._sub_patterns
+            else:
+                new_sub_patterns = [sub_pattern]
+            for sub_pattern in new_sub_patterns:
+                last = sub_patterns[-1] if len(sub_patterns) > 0 else None
+                if _is_empty(sub_pattern):
+                    continue
+                if isinstance(sub_pattern, KxPatternWildcard) and isinstance(
+                    last, KxPatternWildcard
+                ):
+                    continue
+                if _is_chars(sub_pattern) and _is_chars(last):
+                    sub_patterns[-1] = KxPatternChars(
+                        last._pattern + sub_pattern._pattern
+                    )
+                    continue
+                sub_patterns.append(sub_pattern)
+        if len(sub_patterns) == 0:
+            return KxPatternEmpty()
+        # Characters and wildcards have the leftmost-shortest search() result
+        # of a concat-pattern.
+        if len(sub_patterns) == 1 and (
+            _is_chars(sub_patterns[0]) or isinstance(sub_patterns[0], KxPatternWildcard)
+        ):
+            return sub_patterns[0]
+        return KxPatternConcat(sub_patterns)
+
+    def _cost(self) -> float:
+        # Every start and end reached by a wildcard is tried by the DP.
+        wildcards = sum(
+            isinstance(sub_pattern, KxPatternWildcard)
+            for sub_pattern in self._sub_patterns
+        )
+        sub_cost = sum(sub_pattern._cost() for sub_pattern in self._sub_patterns)
+        return 4.0 * (1 + wildcards) * sub_cost
+
+    def _move_ends(self, string: KxString, ends: t.Set[int], endpos: int) -> t.Set[int]:
+        # Moves the set of reachable end positions from one sub-pattern to
+        # the next, without copying substrings.
+        for sub_pattern in self._sub_patterns:
+            if len(ends) == 0:
+                break
+            if isinstance(sub_pattern, KxPatternWildcard):
+                ends = set(range(min(ends), endpos + 1))
+                continue
+            next_ends = set()
+            for end in ends:
+                next_ends |= sub_pattern.full_match_ends(string, end, endpos)
+            ends = next_ends
+        return ends
+
+    def full_match_ends(self, string: KxString, pos: int, endpos: int) -> t.Set[int]:
+        return self._move_ends(string, {pos}, endpos)
+
+    def search(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> t.Union[KxMatch, None]:
+        # Returns the leftmost match, and the shortest among the leftmost ones.
+        # One pass from all starts maps each reachable end to the earliest
+        # start reaching it; the shortest end is then found from that start.
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return None
+        starts = {start: start for start in range(pos, endpos + 1)}
+        for sub_pattern in self._sub_patterns:
+            if len(starts) == 0:
+                return None
+            next_starts = {}
+            if isinstance(sub_pattern, KxPatternWildcard):
+                earliest = endpos + 1
+                for end in range(min(starts), endpos + 1):
+                    earliest = min(earliest, starts.get(end, earliest))
+                    next_starts[end] = earliest
+            else:
+                for end, start in starts.items():
+                    for next_end in sub_pattern.full_match_ends(string, end, endpos):
+                        if start < next_starts.get(next_end, endpos + 1):
+                            next_starts[next_end] = start
+            starts = next_starts
+        if len(starts) == 0:
+            return None
+        start = min(starts.values())
+        return KxMatch(
+            start=start, end=min(self.full_match_ends(string, start, endpos))
+        )
+
+    def contains_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return False
+        ends = self._move_ends(string, set(range(pos, endpos + 1)), endpos)
+        return len(ends) > 0
+
+    def _found_at(self, string: KxString, pos: int, endpos: int) -> t.Optional[bool]:
+        # The leftmost match starts at pos if any match does.
+        if len(self.full_match_ends(string, pos, endpos)) > 0:
+            return True
+        if self.contains_match(string, pos, endpos):
+            return False
         return None
 
-    def full_match(self, string: str) -> bool:
-        n = len(self._sub_patterns)
-        m = len(string)
-        c = [[None for j in range(m + 1)] for i in range(n + 1)]
-        c[0][0] = 0
-        for i in range(1, n + 1):
-            for j in range(m + 1):
-                for k in range(j + 1):
-                    if c[i - 1][k] is not None and self._sub_patterns[i - 1].full_match(
-                        string[k:j]
-                    ):
-                        c[i][j] = c[i - 1][k]
-                        break
-        if c[n][m] is not None:
-            return True
-        return False
+    def full_match(
+        self, string: KxString, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        if pos > endpos:
+            return False
+        return endpos in self.full_match_ends(string, pos, endpos)
@@ -0,0 +1,363 @@
+"""Lazily built DFA for full_match().
+
+A pattern tree is translated into a regular expression term with
+complement and intersection, which expresses the reference semantics of
+every pattern class, including AND- and EXCLUDES-patterns. DFA states are
+the Brzozowski derivatives of this term. They are created the first time
+a key reaches them and memoized, so once warm, full_match() does one dict
+lookup per character.
+"""
+
+import itertools
+import typing as t
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+    _endpos,
+)
+
+DEFAULT_MAX_STATES = 10000
+
+# Terms are interned tuples; children are referred to by their term id.
+_EMPTY = ("empty",)  # matches nothing
+_EPSILON = ("epsilon",)  # matches ""
+_ALL = ("all",)  # matches any string
+
+
+class _Terms:
+    """Interned terms with memoized nullability and derivatives."""
+
+    _ids: t.Dict[tuple, int]
+    _nodes: t.List[tuple]
+    _nullable: t.List[t.Union[bool, None]]
+    transitions: t.List[t.Dict[t.Union[str, None], int]]
+
+    def __init__(self):
+        self._ids = {}
+        self._nodes = []
+        self._nullable = []
+        self.transitions = []
+        self.empty = self._intern(_EMPTY)
+        self.epsilon = self._intern(_EPSILON)
+        self.all = self._intern(_ALL)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def _intern(self, node: tuple) -> int:
+        term = self._ids.get(node)
+        if term is None:
+            term = len(self._nodes)
+            self._ids[node] = term
+            self._nodes.append(node)
+            self._nullable.append(None)
+            self.transitions.append({})
+        return term
+
+    def char(self, char: str) -> int:
+        return self._intern(("char", char))
+
+    def concat(self, terms: t.Iterable[int]) -> int:
+        items = []
+        for term in terms:
+            node = self._nodes[term]
+            for item in node[1] if node[0] == "concat" else (term,):
+                if item == self.empty:
+                    return self.empty
+                if item == self.epsilon:
+                    continue
+                if item == self.all and len(items) > 0 and items[-1] == self.all:
+                    continue
+                items.append(item)
+        if len(items) == 0:
+            return self.epsilon
+        if len(items) == 1:
+            return items[0]
+        return self._intern(("concat", tuple(items)))
+
+    def union(self, terms: t.Iterable[int]) -> int:
+        items = set()
+        for term in terms:
+            node = self._nodes[term]
+            items.update(node[1] if node[0] == "union" else (term,))
+        items.discard(self.empty)
+        if self.all in items:
+            return self.all
+        if len(items) == 0:
+            return self.empty
+        if len(items) == 1:
+            return items.pop()
+        return self._intern(("union", frozenset(items)))
+
+    def intersection(self, terms: t.Iterable[int]) -> int:
+        items = set()
+        for term in terms:
+            node = self._nodes[term]
+            items.update(node[1] if node[0] == "intersection" else (term,))
+        items.discard(self.all)
+        if self.empty in items:
+            return self.empty
+        if len(items) == 0:
+            return self.all
+        if len(items) == 1:
+            return items.pop()
+        return self._intern(("intersection", frozenset(items)))
+
+    def complement(self, term: int) -> int:
+        node = self._nodes[term]
+        if node[0] == "complement":
+            return node[1]
+        if term == self.empty:
+            return self.all
+        if term == self.all:
+            return self.empty
+        return self._intern(("complement", term))
+
+    def nullable(self, term: int) -> bool:
+        result = self._nullable[term]
+        if result is not None:
+            return result
+        node = self._nodes[term]
+        kind = node[0]
+        if kind in ("epsilon", "all"):
+            result = True
+        elif kind in ("empty", "char"):
+            result = False
+        elif kind in ("concat", "intersection"):
+            result = all(self.nullable(item) for item in node[1])
+        elif kind == "union":
+            result = any(self.nullable(item) for item in node[1])
+        else:
+            result = not self.nullable(node[1])
+        self._nullable[term] = result
+        return result
+
+    def derivative(self, term: int, char: t.Union[str, None]) -> int:
+        """Returns the term matching s where char + s matches term.
+
+        char is None for characters that no literal of the pattern contains.
+        """
+        result = self.transitions[term].get(char)
+        if result is not None:
+            return result
+        node = self._nodes[term]
+        kind = node[0]
+        if kind in ("empty", "epsilon"):
+            result = self.empty
+        elif kind == "all":
+            result = self.all
+        elif kind == "char":
+            result = self.epsilon if node[1] == char else self.empty
+        elif kind == "concat":
+            head = node[1][0]
+            tail = self.concat(node[1][1:])
+            result = self.concat([self.derivative(head, char), tail])
+            if self.nullable(head):
+                result = self.union([result, self.derivative(tail, char)])
+        elif kind == "union":
+            result = self.union(self.derivative(item, char) for item in node[1])
+        elif kind == "intersection":
+            result = self.intersection(self.derivative(item, char) for item in node[1])
+        else:
+            result = self.complement(self.derivative(node[1], char))
+        self.transitions[term][char] = result
+        return result
+
+
+class _Translator:
+    # Translates pattern trees into terms. Besides the full-match language,
+    # AND- and EXCLUDES-patterns need the strings for which search() finds
+    # a match, finds one at the start, or finds one that ends at the start.
+    # These mirror the assertions of keylix.regex.
+
+    _terms: _Terms
+
+    def __init__(self, terms: _Terms):
+        self._terms = terms
+
+    def literal(self, chars: str) -> int:
+        return self._terms.concat(self._terms.char(char) for char in chars)
+
+    def full(self, kx_pattern: KxPattern) -> int:
+        terms = self._terms
+        if isinstance(kx_pattern, KxPatternWildcard):
+            return terms.all
+        if isinstance(kx_pattern, KxPatternChars):
+            return self.literal(kx_pattern._pattern)
+        if isinstance(kx_pattern, KxPatternParentheses):
+            return self.full(kx_pattern._sub_pattern)
+        if isinstance(kx_pattern, KxPatternOr):
+            return terms.union(self.full(sub) for sub in kx_pattern._sub_patterns)
+        if isinstance(kx_pattern, KxPatternConcat):
+            return terms.concat(self.full(sub) for sub in kx_pattern._sub_patterns)
+        if isinstance(kx_pattern, KxPatternExcludes):
+            return terms.complement(self.found(kx_pattern._sub_pattern))
+        if isinstance(kx_pattern, KxPatternAnd):
+            sub_patterns = kx_pattern._sub_patterns
+            return terms.intersection(
+                [
+                    self.found(kx_pattern),
+                    terms.union(self.at_start(sub) for sub in sub_patterns),
+                ]
+            )
+        raise TypeError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+    def found(self, kx_pattern: KxPattern) -> int:
+        terms = self._terms
+        if isinstance(kx_pattern, (KxPatternWildcard, KxPatternChars, KxPatternConcat)):
+            return terms.concat([terms.all, self.full(kx_pattern), terms.all])
+        if isinstance(kx_pattern, KxPatternParentheses):
+            return self.found(kx_pattern._sub_pattern)
+        if isinstance(kx_pattern, KxPatternOr):
+            return terms.union(self.found(sub) for sub in kx_pattern._sub_patterns)
+        if isinstance(kx_pattern, KxPatternAnd):
+            return terms.intersection(
+                self.found(sub) for sub in kx_pattern._sub_patterns
+            )
+        if isinstance(kx_pattern, KxPatternExcludes):
+            return terms.complement(self.at_origin(kx_pattern._sub_pattern))
+        raise TypeError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+    def _first_found(
+        self, sub_patterns: t.List[KxPattern], predicate: t.Callable[[KxPattern], int]
+    ) -> int:
+        # KxPatternOr.search() returns the match of the first sub-pattern that
+        # is found: the first one found in the first half, or, when none of
+        # them is found, in the second half. Halving keeps the construction
+        # in O(n log n) terms.
+        terms = self._terms
+        if len(sub_patterns) == 0:
+            return terms.empty
+        if len(sub_patterns) == 1:
+            return predicate(sub_patterns[0])
+        middle = len(sub_patterns) // 2
+        first_half = sub_patterns[:middle]
+        return terms.union(
+            [
+                self._first_found(first_half, predicate),
+                terms.intersection(
+                    [
+                        terms.complement(
+                            terms.union(self.found(sub) for sub in first_half)
+                        ),
+                        self._first_found(sub_patterns[middle:], predicate),
+                    ]
+                ),
+            ]
+        )
+
+    def at_start(self, kx_pattern: KxPattern) -> int:
+        terms = self._terms
+        if isinstance(kx_pattern, (KxPatternWildcard, KxPatternChars, KxPatternConcat)):
+            return terms.concat([self.full(kx_pattern), terms.all])
+        if isinstance(kx_pattern, KxPatternParentheses):
+            return self.at_start(kx_pattern._sub_pattern)
+        if isinstance(kx_pattern, KxPatternOr):
+            return self._first_found(kx_pattern._sub_patterns, self.at_start)
+        if isinstance(kx_pattern, KxPatternAnd):
+            sub_patterns = kx_pattern._sub_patterns
+            return terms.intersection(
+                [
+                    self.found(kx_pattern),
+                    terms.union(self.at_start(sub) for sub in sub_patterns),
+                ]
+            )
+        if isinstance(kx_pattern, KxPatternExcludes):
+            return self.found(kx_pattern)
+        raise TypeError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+    def at_origin(self, kx_pattern: KxPattern) -> int:
+        terms = self._terms
+        if isinstance(kx_pattern, (KxPatternWildcard, KxPatternChars, KxPatternConcat)):
+            # The leftmost-shortest match is empty iff the pattern matches "".
+            if terms.nullable(self.full(kx_pattern)):
+                return terms.all
+            return terms.empty
+        if isinstance(kx_pattern, KxPatternParentheses):
+            return self.at_origin(kx_pattern._sub_pattern)
+        if isinstance(kx_pattern, KxPatternOr):
+            return self._first_found(kx_pattern._sub_patterns, self.at_origin)
+        if isinstance(kx_pattern, KxPatternAnd):
+            return terms.intersection(
+                self.at_origin(sub) for sub in kx_pattern._sub_patterns
+            )
+        if isinstance(kx_pattern, KxPatternExcludes):
+            return self.found(kx_pattern)
+        raise TypeError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+
+def _alphabet(kx_pattern: KxPattern) -> t.Set[str]:
+    if isinstance(kx_pattern, KxPatternChars):
+        return set(kx_pattern._pattern)
+    result = set()
+    if isinstance(kx_pattern, (KxPatternParentheses, KxPatternExcludes)):
+        result |= _alphabet(kx_pattern._sub_pattern)
+    for sub_pattern in getattr(kx_pattern, "_sub_patterns", []):
+        result |= _alphabet(sub_pattern)
+    return result
+
+
+class KxDfa:
+    """A lazily built DFA equivalent to kx_pattern.full_match().
+
+    At most max_states states are memoized; when a key makes the DFA grow
+    beyond that, the states are dropped and rebuilt on demand.
+    """
+
+    _kx_pattern: KxPattern
+    _max_states: int
+    _alphabet: t.FrozenSet[str]
+    _terms: _Terms
+    _start: int
+    # The transitions of the states reached from _start, by key character.
+    _delta: t.Dict[int, t.Dict[str, int]]
+
+    def __init__(self, kx_pattern: KxPattern, max_states: int = DEFAULT_MAX_STATES):
+        self._kx_pattern = kx_pattern
+        self._max_states = max_states
+        self._alphabet = frozenset(_alphabet(kx_pattern))
+        self._reset()
+
+    def _reset(self) -> None:
+        self._terms = _Terms()
+        self._start = _Translator(self._terms).full(self._kx_pattern)
+        self._delta = {self._start: {}}
+
+    def __len__(self) -> int:
+        """Returns the number of memoized states."""
+        return len(self._delta)
+
+    def _step(self, state: int, char: str) -> int:
+        key = char if char in self._alphabet else None
+        next_state = self._terms.derivative(state, key)
+        self._delta[state][char] = next_state
+        if next_state not in self._delta:
+            self._delta[next_state] = {}
+        return next_state
+
+    def full_match(
+        self, string: str, pos: int = 0, endpos: t.Optional[int] = None
+    ) -> bool:
+        endpos = _endpos(string, endpos)
+        terms = self._terms
+        delta = self._delta
+        empty = terms.empty
+        state = self._start
+        for char in itertools.islice(string, pos, endpos):
+            next_state = delta[state].get(char)
+            if next_state is None:
+                next_state = self._step(state, char)
+            state = next_state
+            if state == empty:
+                break
+        result = terms.nullable(state)
+        if len(delta) > self._max_states:
+            self._reset()
+        return result
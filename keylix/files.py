@@ -0,0 +1,71 @@
+"""Scanning of newline-delimited key files."""
+
+import mmap
+import typing as t
+
+from keylix.core import KxPattern
+from keylix.regex import KxRegexError, compile_line_regex
+
+
+def _lines(buffer: t.Any) -> t.Iterator[t.Tuple[int, int]]:
+    # Yields the (start, end) offsets of the lines in buffer, excluding
+    # the newline characters.
+    start = 0
+    size = len(buffer)
+    while start < size:
+        end = buffer.find(b"\n", start)
+        if end == -1:
+            end = size
+        yield start, end
+        start = end + 1
+
+
+def scan_file(
+    path: str,
+    kx_pattern: KxPattern,
+    offsets: bool = False,
+    encoding: str = "utf-8",
+) -> t.Iterator[t.Union[str, int]]:
+    """Yields the lines of a key file that full-match kx_pattern.
+
+    The file is memory-mapped and never loaded as a whole. When the pattern
+    compiles into a regex, the regex runs directly on the mapped buffer;
+    otherwise each line is decoded and matched with full_match(). With
+    offsets=True, the byte offsets of the matching lines are yielded
+    instead of the lines.
+    """
+    with open(path, "rb") as file:
+        try:
+            buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files cannot be mapped.
+            return
+    with buffer:
+        size = len(buffer)
+        try:
+            if encoding.replace("-", "").lower() != "utf8":
+                raise KxRegexError("The line regex matches UTF-8 keys only.")
+            re_pattern = compile_line_regex(kx_pattern)
+        except KxRegexError:
+            re_pattern = None
+
+        if re_pattern is not None:
+            re_matches = re_pattern.finditer(buffer)
+            try:
+                for re_match in re_matches:
+                    start = re_match.start()
+                    end = re_match.end()
+                    # The position after the final newline is not a line.
+                    if start == size:
+                        break
+                    del re_match
+                    yield start if offsets else buffer[start:end].decode(encoding)
+            finally:
+                # The mapping cannot be closed while the regex holds it.
+                del re_matches
+            return
+
+        for start, end in _lines(buffer):
+            line = buffer[start:end].decode(encoding)
+            if kx_pattern.full_match(line):
+                yield start if offsets else line
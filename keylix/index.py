@@ -0,0 +1,219 @@
+"""Indexes over key lists that avoid running full_match() on every key."""
+
+import bisect
+import typing as t
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+    _unwrap,
+)
+
+_MAX_CHAR = chr(0x10FFFF)
+
+
+class KxKeyIndex:
+    """An n-gram inverted index over a list of keys.
+
+    Queries collect the literals that every matching key must contain, look
+    up the keys that contain all n-grams of these literals, and run
+    full_match() only on these candidates.
+    """
+
+    _keys: t.List[str]
+    _n: int
+    _postings: t.Dict[str, t.List[int]]
+
+    def __init__(self, keys: t.Iterable[str], n: int = 3):
+        self._keys = list(keys)
+        self._n = n
+        self._postings = {}
+        for i, key in enumerate(self._keys):
+            for gram in {key[j : j + n] for j in range(len(key) - n + 1)}:
+                posting = self._postings.get(gram)
+                if posting is None:
+                    self._postings[gram] = [i]
+                else:
+                    posting.append(i)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> t.List[str]:
+        return self._keys
+
+    def _literal_candidates(self, literal: str) -> t.Union[t.Set[int], None]:
+        n = self._n
+        if len(literal) < n:
+            return None
+        postings = []
+        for gram in {literal[j : j + n] for j in range(len(literal) - n + 1)}:
+            posting = self._postings.get(gram)
+            if posting is None:
+                return set()
+            postings.append(posting)
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if len(result) == 0:
+                break
+        return result
+
+    def _candidates(self, kx_pattern: KxPattern) -> t.Union[t.Set[int], None]:
+        # Returns the indices of keys that may match kx_pattern, or None if
+        # the pattern does not restrict the keys. Every sub-pattern of
+        # CONCAT-, AND- and OR-patterns must at least be contained in a
+        # matching key, so full_match() and search() share the literals.
+        if isinstance(kx_pattern, KxPatternChars):
+            return self._literal_candidates(kx_pattern._pattern)
+        if isinstance(kx_pattern, KxPatternParentheses):
+            return self._candidates(kx_pattern._sub_pattern)
+        if isinstance(kx_pattern, (KxPatternConcat, KxPatternAnd)):
+            result = None
+            for sub_pattern in kx_pattern._sub_patterns:
+                candidates = self._candidates(sub_pattern)
+                if candidates is None:
+                    continue
+                if result is None:
+                    result = candidates
+                else:
+                    result &= candidates
+            return result
+        if isinstance(kx_pattern, KxPatternOr):
+            result = set()
+            for sub_pattern in kx_pattern._sub_patterns:
+                candidates = self._candidates(sub_pattern)
+                if candidates is None:
+                    return None
+                result |= candidates
+            return result
+        return None
+
+    def candidates(self, kx_pattern: KxPattern) -> t.List[int]:
+        """Returns the sorted indices of keys that may full-match kx_pattern."""
+        candidates = self._candidates(kx_pattern)
+        if candidates is None:
+            return list(range(len(self._keys)))
+        return sorted(candidates)
+
+    def filter_indices(self, kx_pattern: KxPattern) -> t.List[int]:
+        """Returns the sorted indices of keys that full-match kx_pattern."""
+        keys = self._keys
+        return [
+            i for i in self.candidates(kx_pattern) if kx_pattern.full_match(keys[i])
+        ]
+
+    def filter(self, kx_pattern: KxPattern) -> t.List[str]:
+        """Returns the keys that full-match kx_pattern, in index order."""
+        keys = self._keys
+        return [keys[i] for i in self.filter_indices(kx_pattern)]
+
+
+def _prefix_range(keys: t.List[str], prefix: str) -> t.Tuple[int, int]:
+    # Keys starting with prefix sort between prefix and the smallest string
+    # that is greater than all of them.
+    start = bisect.bisect_left(keys, prefix)
+    upper = prefix.rstrip(_MAX_CHAR)
+    if upper == "":
+        return start, len(keys)
+    upper = upper[:-1] + chr(ord(upper[-1]) + 1)
+    return start, bisect.bisect_left(keys, upper, lo=start)
+
+
+class KxSortedKeyIndex:
+    """A sorted copy of a key list for prefix- and suffix-anchored patterns.
+
+    Keys are kept sorted, together with a copy of the reversed keys sorted
+    for suffix lookups. Chars patterns and concat-patterns that start or end
+    with characters are answered with two bisects. The rest of the pattern
+    is verified with full_match() on the keys of the narrower range only.
+    """
+
+    _keys: t.List[str]
+    _reversed_keys: t.List[str]
+    _reversed_order: t.List[int]
+
+    def __init__(self, keys: t.Iterable[str]):
+        self._keys = sorted(keys)
+        self._reversed_order = sorted(
+            range(len(self._keys)), key=lambda i: self._keys[i][::-1]
+        )
+        self._reversed_keys = [self._keys[i][::-1] for i in self._reversed_order]
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    @property
+    def keys(self) -> t.List[str]:
+        return self._keys
+
+    def prefix_range(self, prefix: str) -> t.Tuple[int, int]:
+        """Returns the range of sorted keys that start with prefix."""
+        return _prefix_range(self._keys, prefix)
+
+    def suffix_indices(self, suffix: str) -> t.List[int]:
+        """Returns the sorted indices of keys that end with suffix."""
+        start, end = _prefix_range(self._reversed_keys, suffix[::-1])
+        return sorted(self._reversed_order[start:end])
+
+    def filter_indices(self, kx_pattern: KxPattern) -> t.List[int]:
+        """Returns the sorted indices of keys that full-match kx_pattern."""
+        kx_pattern = _unwrap(kx_pattern)
+        keys = self._keys
+        if isinstance(kx_pattern, KxPatternChars):
+            start = bisect.bisect_left(keys, kx_pattern._pattern)
+            end = bisect.bisect_right(keys, kx_pattern._pattern, lo=start)
+            return list(range(start, end))
+        if not isinstance(kx_pattern, KxPatternConcat):
+            return [i for i, key in enumerate(keys) if kx_pattern.full_match(key)]
+
+        sub_patterns = [_unwrap(sub) for sub in kx_pattern._sub_patterns]
+        prefix = ""
+        n_prefix = 0
+        for sub_pattern in sub_patterns:
+            if not isinstance(sub_pattern, KxPatternChars):
+                break
+            prefix += sub_pattern._pattern
+            n_prefix += 1
+        suffix = ""
+        n_suffix = 0
+        for sub_pattern in reversed(sub_patterns[n_prefix:]):
+            if not isinstance(sub_pattern, KxPatternChars):
+                break
+            suffix = sub_pattern._pattern + suffix
+            n_suffix += 1
+        rest = sub_patterns[n_prefix : len(sub_patterns) - n_suffix]
+        # "prefix*", "*suffix" and "prefix*suffix" without an overlap between
+        # the prefix and the suffix need no verification.
+        rest_is_wildcard = len(rest) == 1 and isinstance(rest[0], KxPatternWildcard)
+
+        start, end = _prefix_range(keys, prefix)
+        if suffix == "":
+            indices = range(start, end)
+        else:
+            r_start, r_end = _prefix_range(self._reversed_keys, suffix[::-1])
+            if r_end - r_start < end - start:
+                indices = [
+                    i
+                    for i in sorted(self._reversed_order[r_start:r_end])
+                    if start <= i < end
+                ]
+            else:
+                indices = [i for i in range(start, end) if keys[i].endswith(suffix)]
+
+        if rest_is_wildcard:
+            min_length = len(prefix) + len(suffix)
+            return [i for i in indices if len(keys[i]) >= min_length]
+        return [i for i in indices if kx_pattern.full_match(keys[i])]
+
+    def filter(self, kx_pattern: KxPattern) -> t.List[str]:
+        """Returns the keys that full-match kx_pattern, in sorted order."""
+        keys = self._keys
+        return [keys[i] for i in self.filter_indices(kx_pattern)]
@@ -0,0 +1,74 @@
+"""Mutable key sets with incrementally maintained query results."""
+
+import typing as t
+
+from keylix.core import KxPattern
+from keylix.patternset import KxPatternSet
+
+
+class KxKeySet:
+    """A mutable set of keys with standing queries, identified by IDs.
+
+    The result of each query, the keys that full-match its pattern, is kept
+    up to date as keys are added and removed: an added key is matched once
+    against all queries through a KxPatternSet, and a removed key is dropped
+    from the results. Reading a result does not match any key. Keys must be
+    str.
+    """
+
+    _keys: t.Set[str]
+    _queries: KxPatternSet
+    _results: t.Dict[t.Hashable, t.Set[str]]
+
+    def __init__(self, keys: t.Iterable[str] = ()):
+        self._keys = set(keys)
+        self._queries = KxPatternSet()
+        self._results = {}
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._keys)
+
+    def add(self, key: str) -> None:
+        if key in self._keys:
+            return
+        self._keys.add(key)
+        for query_id in self._queries.match(key):
+            self._results[query_id].add(key)
+
+    def remove(self, key: str) -> None:
+        """Removes a key. Raises KeyError if the key is not in the set."""
+        self._keys.remove(key)
+        for result in self._results.values():
+            result.discard(key)
+
+    def discard(self, key: str) -> None:
+        if key in self._keys:
+            self.remove(key)
+
+    def add_query(self, query_id: t.Hashable, kx_pattern: KxPattern) -> None:
+        """Adds a query, replacing the query registered with the same ID.
+
+        Its result is computed from the current keys.
+        """
+        self._queries.add(query_id, kx_pattern)
+        self._results[query_id] = {
+            key for key in self._keys if kx_pattern.full_match(key)
+        }
+
+    def remove_query(self, query_id: t.Hashable) -> None:
+        """Removes a query. Raises KeyError if the ID is not registered."""
+        self._queries.remove(query_id)
+        del self._results[query_id]
+
+    def result(self, query_id: t.Hashable) -> t.AbstractSet[str]:
+        """Returns the current keys matching the query, without copying them.
+
+        The returned set changes with the key set and must not be modified.
+        """
+        return self._results[query_id]
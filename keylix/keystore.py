@@ -0,0 +1,80 @@
+"""Compact in-memory storage of many keys."""
+
+import array
+import typing as t
+
+from keylix.arena import _filter_range
+from keylix.core import KxPattern, KxString
+
+
+class KxKeyStore:
+    """Keys encoded as UTF-8 in one buffer, with an array('Q') of offsets.
+
+    A key costs its encoded length plus 8 bytes, instead of a str object.
+    Keys are decoded to str only when read; filter() matches them in the
+    buffer.
+    """
+
+    _data: bytearray
+    _offsets: "array.array[int]"
+
+    def __init__(self, keys: t.Iterable[KxString] = ()):
+        self._data = bytearray()
+        self._offsets = array.array("Q", [0])
+        self.extend(keys)
+
+    def append(self, key: KxString) -> None:
+        self._data += key.encode("utf-8") if isinstance(key, str) else key
+        self._offsets.append(len(self._data))
+
+    def extend(self, keys: t.Iterable[KxString]) -> None:
+        for key in keys:
+            self.append(key)
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index: t.Union[int, slice]) -> t.Union[str, "KxKeyStore"]:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                return KxKeyStore(self[i] for i in range(start, stop, step))
+            # Copies the keys as one block and rebases their offsets.
+            store = KxKeyStore()
+            stop = max(start, stop)
+            base = self._offsets[start]
+            store._data = self._data[base : self._offsets[stop]]
+            store._offsets = array.array(
+                "Q", (offset - base for offset in self._offsets[start : stop + 1])
+            )
+            return store
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("key store index out of range")
+        start = self._offsets[index]
+        end = self._offsets[index + 1]
+        return self._data[start:end].decode("utf-8")
+
+    def __iter__(self) -> t.Iterator[str]:
+        data = self._data
+        offsets = self._offsets
+        for i in range(len(self)):
+            yield data[offsets[i] : offsets[i + 1]].decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        """Returns the size of the buffer and offsets in bytes."""
+        return len(self._data) + len(self._offsets) * self._offsets.itemsize
+
+    def filter(
+        self, kx_pattern: KxPattern, start: int = 0, stop: t.Optional[int] = None
+    ) -> "array.array[int]":
+        """Returns an array('Q') of the indices of the keys that full-match.
+
+        Only the keys with indices in [start, stop) are matched, in the
+        buffer, by the UTF-8 regex of the pattern where it has one.
+        """
+        if stop is None or stop > len(self):
+            stop = len(self)
+        return _filter_range(kx_pattern, self._data, self._offsets, start, stop)
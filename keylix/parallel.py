@@ -0,0 +1,109 @@
+"""Parallel filtering of large key lists over a process pool."""
+
+import array
+import concurrent.futures
+import typing as t
+
+from keylix.arena import KxKeyArena
+from keylix.core import KxPattern
+
+DEFAULT_CHUNKSIZE = 10000
+
+# The pattern of the current worker process, set once by _init_worker().
+_worker_pattern: t.Union[KxPattern, None] = None
+# The arena of the current worker process, set once by _init_arena_worker().
+_worker_arena: t.Union[KxKeyArena, None] = None
+
+
+def _init_worker(kx_pattern: KxPattern) -> None:
+    global _worker_pattern
+    _worker_pattern = kx_pattern
+
+
+def _init_arena_worker(kx_pattern: KxPattern, arena: KxKeyArena) -> None:
+    global _worker_pattern, _worker_arena
+    _worker_pattern = kx_pattern
+    _worker_arena = arena
+
+
+def _filter_chunk(
+    kx_pattern: KxPattern, start: int, keys: t.Sequence[str], indices: bool
+) -> t.List:
+    if indices:
+        return [start + i for i, key in enumerate(keys) if kx_pattern.full_match(key)]
+    return [key for key in keys if kx_pattern.full_match(key)]
+
+
+def _filter_worker_chunk(args: t.Tuple[int, t.Sequence[str], bool]) -> t.List:
+    start, keys, indices = args
+    return _filter_chunk(_worker_pattern, start, keys, indices)
+
+
+def _filter_arena_chunk(args: t.Tuple[int, int]) -> bytes:
+    start, stop = args
+    return _worker_pattern.filter_arena(_worker_arena, start, stop).tobytes()
+
+
+def filter_parallel(
+    keys: t.Sequence[str],
+    kx_pattern: KxPattern,
+    workers: t.Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+    indices: bool = False,
+) -> t.List:
+    """Returns the keys that full-match kx_pattern, in their original order.
+
+    The keys are split into chunks of chunksize keys and filtered by a pool of
+    workers processes (the number of CPUs by default). The pattern is sent
+    to each worker once. With indices=True, the indices of the matching keys
+    are returned instead, which keeps the results sent back by the workers
+    small.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be positive.")
+    if len(keys) <= chunksize or workers == 1:
+        return _filter_chunk(kx_pattern, 0, keys, indices)
+
+    chunks = (
+        (start, keys[start : start + chunksize], indices)
+        for start in range(0, len(keys), chunksize)
+    )
+    result = []
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(kx_pattern,)
+    ) as executor:
+        for chunk_result in executor.map(_filter_worker_chunk, chunks):
+            result.extend(chunk_result)
+    return result
+
+
+def filter_arena(
+    arena: KxKeyArena,
+    kx_pattern: KxPattern,
+    workers: t.Optional[int] = None,
+    chunksize: int = DEFAULT_CHUNKSIZE,
+) -> "array.array[int]":
+    """Returns an array('Q') of the indices of the arena keys that full-match.
+
+    Like filter_parallel(), but the workers attach to the shared memory of
+    the arena and are only sent index ranges, and they send back the
+    indices as raw arrays.
+    """
+    if chunksize < 1:
+        raise ValueError("chunksize must be positive.")
+    if len(arena) <= chunksize or workers == 1:
+        return kx_pattern.filter_arena(arena)
+
+    chunks = (
+        (start, min(start + chunksize, len(arena)))
+        for start in range(0, len(arena), chunksize)
+    )
+    result = array.array("Q")
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_arena_worker,
+        initargs=(kx_pattern, arena),
+    ) as executor:
+        for chunk_result in executor.map(_filter_arena_chunk, chunks):
+            result.frombytes(chunk_result)
+    return result
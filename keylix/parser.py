@@ -0,0 +1,161 @@
+"""Parser for the keylix pattern notation (see docs/keylix_spec.md)."""
+
+import functools
+import typing as t
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternEmpty,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+)
+
+# Maximum number of parsed patterns kept by compile().
+COMPILE_CACHE_SIZE = 1024
+
+# Maximum nesting of parentheses and exclusions. Parsing and matching recurse
+# once per level, so deeper patterns would exhaust the Python stack.
+MAX_NESTING_DEPTH = 100
+
+_SPECIAL_CHARS = '~*&|(){}"\\ '
+_OPERATORS = "|&"
+
+
+class KxSyntaxError(ValueError):
+    """The pattern text does not follow the keylix notation."""
+
+    position: int
+
+    def __init__(self, message: str, position: int):
+        super().__init__(f"{message} (position {position})")
+        self.position = position
+
+
+def _is_special(char: str) -> bool:
+    return char in _SPECIAL_CHARS or ord(char) <= 31
+
+
+class _Parser:
+
+    _text: str
+    _pos: int
+    _depth: int
+
+    def __init__(self, text: str):
+        self._text = text
+        self._pos = 0
+        self._depth = 0
+
+    def _peek(self) -> t.Union[str, None]:
+        if self._pos < len(self._text):
+            return self._text[self._pos]
+        return None
+
+    def _skip_spaces(self) -> None:
+        while self._peek() == " ":
+            self._pos += 1
+
+    def parse(self) -> KxPattern:
+        kx_pattern = self._parse_expression()
+        if self._peek() is not None:
+            raise KxSyntaxError(f'Unexpected "{self._peek()}"', self._pos)
+        return kx_pattern
+
+    def _parse_expression(self) -> KxPattern:
+        sub_patterns = [self._parse_concat()]
+        operator = None
+        while True:
+            self._skip_spaces()
+            char = self._peek()
+            if char is None or char == ")":
+                break
+            if char not in _OPERATORS:
+                raise KxSyntaxError(
+                    "Spaces are not allowed between concatenated expressions",
+                    self._pos,
+                )
+            if operator is not None and char != operator:
+                raise KxSyntaxError(
+                    f'Cannot mix "{operator}" and "{char}" in one sequence', self._pos
+                )
+            operator = char
+            self._pos += 1
+            sub_patterns.append(self._parse_concat())
+
+        if operator is None:
+            return sub_patterns[0]
+        if operator == "|":
+            return KxPatternOr(sub_patterns)
+        # Empty pattern expressions in AND-pattern sequences are ignored.
+        return KxPatternAnd(
+            [sub for sub in sub_patterns if not isinstance(sub, KxPatternEmpty)]
+        )
+
+    def _parse_concat(self) -> KxPattern:
+        self._skip_spaces()
+        sub_patterns = []
+        while True:
+            char = self._peek()
+            if char is None or char in _OPERATORS or char in ") ":
+                break
+            sub_patterns.append(self._parse_atom())
+
+        if len(sub_patterns) == 0:
+            return KxPatternEmpty()
+        if len(sub_patterns) == 1:
+            return sub_patterns[0]
+        return KxPatternConcat(sub_patterns)
+
+    def _parse_atom(self) -> KxPattern:
+        start = self._pos
+        char = self._peek()
+        if char == "*":
+            self._pos += 1
+            return KxPatternWildcard()
+        if char == "(":
+            self._pos += 1
+            return KxPatternParentheses(self._parse_group(start))
+        if char == "~":
+            self._pos += 1
+            if self._peek() != "(":
+                raise KxSyntaxError('"~" must be followed by "("', self._pos)
+            self._pos += 1
+            return KxPatternExcludes(self._parse_group(start))
+        if _is_special(char):
+            raise KxSyntaxError(f'Unsupported special character "{char}"', start)
+
+        while self._peek() is not None and not _is_special(self._peek()):
+            self._pos += 1
+        return KxPatternChars(self._text[start : self._pos])
+
+    def _parse_group(self, start: int) -> KxPattern:
+        if self._depth == MAX_NESTING_DEPTH:
+            raise KxSyntaxError(
+                f"Groups are nested deeper than {MAX_NESTING_DEPTH} levels", start
+            )
+        self._depth += 1
+        kx_pattern = self._parse_expression()
+        self._depth -= 1
+        if self._peek() != ")":
+            raise KxSyntaxError('Missing closing ")"', start)
+        self._pos += 1
+        return kx_pattern
+
+
+def parse(text: str) -> KxPattern:
+    """Parses a keylix pattern into a KxPattern tree."""
+    return _Parser(text).parse()
+
+
+@functools.lru_cache(maxsize=COMPILE_CACHE_SIZE)
+def compile(text: str) -> KxPattern:
+    """Parses a keylix pattern, reusing the trees of recently used patterns.
+
+    The returned tree is shared between callers and must not be modified.
+    """
+    return parse(text)
@@ -0,0 +1,176 @@
+"""Matching of keys against many patterns at once."""
+
+import typing as t
+
+from keylix.ahocorasick import KxAhoCorasick
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternOr,
+    _unwrap,
+)
+
+_UNINDEXED = ("unindexed", "")
+
+
+def _required_literals(kx_pattern: KxPattern) -> t.List[str]:
+    # Literals that every key matching kx_pattern contains.
+    kx_pattern = _unwrap(kx_pattern)
+    if isinstance(kx_pattern, KxPatternChars):
+        return [kx_pattern._pattern]
+    if isinstance(kx_pattern, (KxPatternConcat, KxPatternAnd)):
+        literals = []
+        for sub_pattern in kx_pattern._sub_patterns:
+            literals.extend(_required_literals(sub_pattern))
+        return literals
+    return []
+
+
+def _index_keys(kx_pattern: KxPattern) -> t.List[t.Tuple[str, str]]:
+    # The index keys of kx_pattern: one per branch of an OR-pattern, since a
+    # matching key matches one of them, or _UNINDEXED if a branch has none.
+    unwrapped = _unwrap(kx_pattern)
+    if isinstance(unwrapped, KxPatternOr):
+        index_keys = []
+        for sub_pattern in unwrapped._sub_patterns:
+            sub_index_keys = _index_keys(sub_pattern)
+            if _UNINDEXED in sub_index_keys:
+                return [_UNINDEXED]
+            index_keys.extend(sub_index_keys)
+        return list(dict.fromkeys(index_keys))
+    if isinstance(unwrapped, KxPatternChars):
+        return [("exact", unwrapped._pattern)]
+
+    prefix = ""
+    if isinstance(unwrapped, KxPatternConcat):
+        for sub_pattern in unwrapped._sub_patterns:
+            sub_pattern = _unwrap(sub_pattern)
+            if not isinstance(sub_pattern, KxPatternChars):
+                break
+            prefix += sub_pattern._pattern
+    literals = [lit for lit in _required_literals(kx_pattern) if lit != ""]
+    if prefix != "" and len(prefix) >= max(map(len, literals)):
+        return [("prefix", prefix)]
+    if len(literals) > 0:
+        return [("substring", max(literals, key=len))]
+    return [_UNINDEXED]
+
+
+class KxPatternSet:
+    """A set of patterns, identified by IDs, matched together against keys.
+
+    Patterns are indexed by the most selective literal they require: the
+    whole key for characters, a key prefix for concat-patterns starting with
+    characters, or otherwise the longest literal every matching key
+    contains. OR-patterns are indexed under the literal of each branch. A
+    key is looked up in these indexes, and only the patterns found there,
+    plus the patterns without any literal, are verified with full_match().
+    Keys must be str.
+    """
+
+    _patterns: t.Dict[t.Hashable, KxPattern]
+    _exact: t.Dict[str, t.Set[t.Hashable]]
+    _prefixes: t.Dict[str, t.Set[t.Hashable]]
+    _prefix_lengths: t.Dict[int, int]
+    _substrings: t.Dict[str, t.Set[t.Hashable]]
+    _unindexed: t.Set[t.Hashable]
+    _index_keys: t.Dict[t.Hashable, t.List[t.Tuple[str, str]]]
+    _automaton: t.Union[KxAhoCorasick, None]
+    _automaton_literals: t.List[str]
+
+    def __init__(
+        self, kx_patterns: t.Optional[t.Mapping[t.Hashable, KxPattern]] = None
+    ):
+        self._patterns = {}
+        self._exact = {}
+        self._prefixes = {}
+        self._prefix_lengths = {}
+        self._substrings = {}
+        self._unindexed = set()
+        self._index_keys = {}
+        self._automaton = None
+        self._automaton_literals = []
+        if kx_patterns is not None:
+            for pattern_id, kx_pattern in kx_patterns.items():
+                self.add(pattern_id, kx_pattern)
+
+    def __len__(self) -> int:
+        return len(self._patterns)
+
+    def __contains__(self, pattern_id: t.Hashable) -> bool:
+        return pattern_id in self._patterns
+
+    def add(self, pattern_id: t.Hashable, kx_pattern: KxPattern) -> None:
+        """Adds a pattern, replacing the pattern registered with the same ID."""
+        if pattern_id in self._patterns:
+            self.remove(pattern_id)
+        self._patterns[pattern_id] = kx_pattern
+        self._index_keys[pattern_id] = _index_keys(kx_pattern)
+        for kind, literal in self._index_keys[pattern_id]:
+            if kind == "exact":
+                self._exact.setdefault(literal, set()).add(pattern_id)
+            elif kind == "prefix":
+                self._prefixes.setdefault(literal, set()).add(pattern_id)
+                self._prefix_lengths[len(literal)] = (
+                    self._prefix_lengths.get(len(literal), 0) + 1
+                )
+            elif kind == "substring":
+                if literal not in self._substrings:
+                    self._substrings[literal] = set()
+                    self._automaton = None
+                self._substrings[literal].add(pattern_id)
+            else:
+                self._unindexed.add(pattern_id)
+
+    def remove(self, pattern_id: t.Hashable) -> None:
+        """Removes a pattern. Raises KeyError if the ID is not registered."""
+        del self._patterns[pattern_id]
+        for kind, literal in self._index_keys.pop(pattern_id):
+            if kind == "exact":
+                self._discard(self._exact, literal, pattern_id)
+            elif kind == "prefix":
+                self._discard(self._prefixes, literal, pattern_id)
+                self._prefix_lengths[len(literal)] -= 1
+                if self._prefix_lengths[len(literal)] == 0:
+                    del self._prefix_lengths[len(literal)]
+            elif kind == "substring":
+                if self._discard(self._substrings, literal, pattern_id):
+                    self._automaton = None
+            else:
+                self._unindexed.discard(pattern_id)
+
+    @staticmethod
+    def _discard(
+        index: t.Dict[str, t.Set[t.Hashable]], literal: str, pattern_id: t.Hashable
+    ) -> bool:
+        # Returns True if the literal was removed from the index.
+        pattern_ids = index[literal]
+        pattern_ids.discard(pattern_id)
+        if len(pattern_ids) == 0:
+            del index[literal]
+            return True
+        return False
+
+    def _candidates(self, key: str) -> t.Set[t.Hashable]:
+        candidates = set(self._unindexed)
+        candidates.update(self._exact.get(key, ()))
+        for length in self._prefix_lengths:
+            if length <= len(key):
+                candidates.update(self._prefixes.get(key[:length], ()))
+        if len(self._substrings) > 0:
+            if self._automaton is None:
+                self._automaton_literals = list(self._substrings)
+                self._automaton = KxAhoCorasick(self._automaton_literals)
+            for i in self._automaton.find_all(key, 0, len(key)):
+                candidates.update(self._substrings[self._automaton_literals[i]])
+        return candidates
+
+    def match(self, key: str) -> t.Set[t.Hashable]:
+        """Returns the IDs of the patterns that key full-matches."""
+        return {
+            pattern_id
+            for pattern_id in self._candidates(key)
+            if self._patterns[pattern_id].full_match(key)
+        }
@@ -0,0 +1,157 @@
+"""Per-node call statistics of pattern trees."""
+
+import time
+import typing as t
+
+from keylix.core import KxPattern
+
+# The matching methods that are counted. full_match_ends() calls are the
+# steps of the dynamic programming in concat-patterns.
+PROFILED_METHODS = ("full_match", "contains_match", "search", "full_match_ends")
+
+KxProfileCallback = t.Callable[[KxPattern, str, bool, float], None]
+
+
+class KxCallStats:
+    calls: int
+    accepts: int
+    rejects: int
+    seconds: float
+
+    def __init__(self):
+        self.calls = 0
+        self.accepts = 0
+        self.rejects = 0
+        self.seconds = 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.calls} calls, {self.accepts} accepted, {self.rejects} rejected,"
+            f" {self.seconds * 1000:.3f} ms"
+        )
+
+
+class KxProfileNode:
+    """The statistics of one node of a pattern tree, and of its sub-patterns.
+
+    Times are cumulative: they include the calls into sub-patterns.
+    """
+
+    kx_pattern: KxPattern
+    stats: t.Dict[str, KxCallStats]
+    children: t.List["KxProfileNode"]
+
+    def __init__(self, kx_pattern: KxPattern):
+        self.kx_pattern = kx_pattern
+        self.stats = {method: KxCallStats() for method in PROFILED_METHODS}
+        self.children = []
+
+    def _lines(self, depth: int) -> t.List[str]:
+        lines = ["  " * depth + str(self.kx_pattern)]
+        for method, stats in self.stats.items():
+            if stats.calls > 0:
+                lines.append("  " * depth + f"  {method}: {stats}")
+        for child in self.children:
+            lines.extend(child._lines(depth + 1))
+        return lines
+
+    def __str__(self) -> str:
+        return "\n".join(self._lines(0))
+
+
+def _sub_patterns(kx_pattern: KxPattern) -> t.List[KxPattern]:
+    if hasattr(kx_pattern, "_sub_pattern"):
+        return [kx_pattern._sub_pattern]
+    return list(getattr(kx_pattern, "_sub_patterns", []))
+
+
+class KxProfiler:
+    """Counts the calls of the matching methods of every node of kx_pattern.
+
+    While the profiler is started, the methods of each node are replaced by
+    counting wrappers on the node instances; stop() removes them, so
+    patterns that are not profiled run unchanged. callback, if given, is
+    called after every counted call with the node, the method name, whether
+    the call accepted, and its duration in seconds.
+    """
+
+    _kx_pattern: KxPattern
+    _callback: t.Union[KxProfileCallback, None]
+    _root: KxProfileNode
+    _nodes: t.List[KxProfileNode]
+    _started: bool
+
+    def __init__(
+        self,
+        kx_pattern: KxPattern,
+        callback: t.Optional[KxProfileCallback] = None,
+    ):
+        self._kx_pattern = kx_pattern
+        self._callback = callback
+        self._nodes = []
+        self._root = self._build(kx_pattern, {})
+        self._started = False
+
+    def _build(
+        self, kx_pattern: KxPattern, seen: t.Dict[int, KxProfileNode]
+    ) -> KxProfileNode:
+        # A node that occurs more than once in the tree is counted once.
+        node = seen.get(id(kx_pattern))
+        if node is None:
+            node = KxProfileNode(kx_pattern)
+            seen[id(kx_pattern)] = node
+            self._nodes.append(node)
+            for sub_pattern in _sub_patterns(kx_pattern):
+                node.children.append(self._build(sub_pattern, seen))
+        return node
+
+    def _wrap(self, node: KxProfileNode, method: str) -> t.Callable:
+        function = getattr(node.kx_pattern, method)
+        stats = node.stats[method]
+        callback = self._callback
+        perf_counter = time.perf_counter
+
+        def wrapper(*args: t.Any, **kwargs: t.Any) -> t.Any:
+            start = perf_counter()
+            result = function(*args, **kwargs)
+            seconds = perf_counter() - start
+            # Matches, non-empty end sets and True accept.
+            accepted = bool(result)
+            stats.calls += 1
+            if accepted:
+                stats.accepts += 1
+            else:
+                stats.rejects += 1
+            stats.seconds += seconds
+            if callback is not None:
+                callback(node.kx_pattern, method, accepted, seconds)
+            return result
+
+        return wrapper
+
+    def start(self) -> None:
+        if self._started:
+            return
+        for node in self._nodes:
+            for method in PROFILED_METHODS:
+                setattr(node.kx_pattern, method, self._wrap(node, method))
+        self._started = True
+
+    def stop(self) -> None:
+        if not self._started:
+            return
+        for node in self._nodes:
+            for method in PROFILED_METHODS:
+                delattr(node.kx_pattern, method)
+        self._started = False
+
+    def __enter__(self) -> "KxProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        self.stop()
+
+    def report(self) -> KxProfileNode:
+        """Returns the statistics tree, which mirrors the pattern tree."""
+        return self._root
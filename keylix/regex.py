@@ -0,0 +1,266 @@
+"""Compiles a KxPattern tree into a single native `re` pattern.
+
+The classes in `keylix.core` remain the reference semantics. The regex
+produced here agrees with them on `full_match()` and `contains_match()`.
+
+AND- and EXCLUDES-patterns are translated into lookaheads, which can only
+look at the whole string. They are therefore supported everywhere except
+inside a multi-element CONCAT-pattern, where the sub-pattern has to match a
+substring of the key.
+"""
+
+import re
+import typing as t
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+)
+
+# Zero-width assertions that always and never succeed.
+# Patterns whose regex source is longer than this are not compiled by
+# compile_bounded_regex(); compiling them costs more than the tree saves.
+MAX_REGEX_SIZE = 100000
+
+_ALWAYS = ""
+_NEVER = "(?!)"
+
+
+class KxRegexError(ValueError):
+    """The pattern tree cannot be expressed as a single regex."""
+
+
+def _all(assertions: t.Iterable[str]) -> str:
+    result = ""
+    for assertion in assertions:
+        if assertion == _NEVER:
+            return _NEVER
+        result += assertion
+    return result
+
+
+def _any(assertions: t.Iterable[str]) -> str:
+    alternatives = []
+    for assertion in assertions:
+        if assertion == _ALWAYS:
+            return _ALWAYS
+        if assertion != _NEVER:
+            alternatives.append(assertion)
+    if len(alternatives) == 0:
+        return _NEVER
+    if len(alternatives) == 1:
+        return alternatives[0]
+    return "(?:" + "|".join(alternatives) + ")"
+
+
+def _not(assertion: str) -> str:
+    if assertion == _ALWAYS:
+        return _NEVER
+    if assertion == _NEVER:
+        return _ALWAYS
+    return f"(?!{assertion})"
+
+
+def _first_found(
+    sub_patterns: t.List[KxPattern], predicate: t.Callable[[KxPattern], str]
+) -> str:
+    # KxPatternOr.search() returns the match of the first sub-pattern that is
+    # found, so a property of that match holds if it holds for the first one
+    # found in the first half of the sub-patterns, or, when none of them is
+    # found, for the first one found in the second half. Halving keeps the
+    # regex O(n log n) long and O(log n) deep; a chain of n nested groups is
+    # too deep for re to compile.
+    if len(sub_patterns) == 0:
+        return _NEVER
+    if len(sub_patterns) == 1:
+        return predicate(sub_patterns[0])
+    middle = len(sub_patterns) // 2
+    first_half = sub_patterns[:middle]
+    return _any(
+        [
+            _first_found(first_half, predicate),
+            _all(
+                [
+                    _not(_any(_found(sub) for sub in first_half)),
+                    _first_found(sub_patterns[middle:], predicate),
+                ]
+            ),
+        ]
+    )
+
+
+def _full(kx_pattern: KxPattern, whole: bool) -> str:
+    """Returns a regex that consumes exactly the strings kx_pattern full-matches.
+
+    `whole` is True when the regex is applied to the whole key (starting at
+    position 0), so that lookaheads are allowed.
+    """
+    if isinstance(kx_pattern, KxPatternWildcard):
+        return ".*"
+    if isinstance(kx_pattern, KxPatternChars):
+        return re.escape(kx_pattern._pattern)
+    if isinstance(kx_pattern, KxPatternParentheses):
+        return f"(?:{_full(kx_pattern._sub_pattern, whole)})"
+    if isinstance(kx_pattern, KxPatternOr):
+        alternatives = [_full(sub, whole) for sub in kx_pattern._sub_patterns]
+        alternatives = [a for a in alternatives if a != _NEVER]
+        if len(alternatives) == 0:
+            return _NEVER
+        return "(?:" + "|".join(alternatives) + ")"
+    if isinstance(kx_pattern, KxPatternConcat):
+        sub_patterns = kx_pattern._sub_patterns
+        sub_whole = whole and len(sub_patterns) == 1
+        return "".join(f"(?:{_full(sub, sub_whole)})" for sub in sub_patterns)
+    if not whole:
+        raise KxRegexError(
+            f"{type(kx_pattern).__name__} is not supported inside a concat-pattern."
+        )
+    if isinstance(kx_pattern, KxPatternExcludes):
+        return _all([_not(_found(kx_pattern._sub_pattern)), ".*"])
+    if isinstance(kx_pattern, KxPatternAnd):
+        sub_patterns = kx_pattern._sub_patterns
+        return _all(
+            [_found(kx_pattern)]
+            + [_any(_at_start(sub) for sub in sub_patterns)]
+            + [".*"]
+        )
+    raise KxRegexError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+
+def _found(kx_pattern: KxPattern) -> str:
+    """Asserts at position 0 that kx_pattern.search() is not None."""
+    if isinstance(kx_pattern, KxPatternWildcard):
+        return _ALWAYS
+    if isinstance(kx_pattern, KxPatternChars):
+        if kx_pattern._pattern == "":
+            return _ALWAYS
+        return f"(?=.*?{re.escape(kx_pattern._pattern)})"
+    if isinstance(kx_pattern, KxPatternParentheses):
+        return _found(kx_pattern._sub_pattern)
+    if isinstance(kx_pattern, KxPatternOr):
+        return _any(_found(sub) for sub in kx_pattern._sub_patterns)
+    if isinstance(kx_pattern, KxPatternAnd):
+        return _all(_found(sub) for sub in kx_pattern._sub_patterns)
+    if isinstance(kx_pattern, KxPatternExcludes):
+        # KxPatternExcludes.search() fails only when the sub-pattern match
+        # does not end after position 0.
+        return _not(_at_origin(kx_pattern._sub_pattern))
+    if isinstance(kx_pattern, KxPatternConcat):
+        full = _full(kx_pattern, False)
+        if full == "":
+            return _ALWAYS
+        return f"(?=.*?{full})"
+    raise KxRegexError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+
+def _at_start(kx_pattern: KxPattern) -> str:
+    """Asserts at position 0 that kx_pattern.search() returns a match at 0."""
+    if isinstance(kx_pattern, KxPatternWildcard):
+        return _ALWAYS
+    if isinstance(kx_pattern, KxPatternChars):
+        if kx_pattern._pattern == "":
+            return _ALWAYS
+        return f"(?={re.escape(kx_pattern._pattern)})"
+    if isinstance(kx_pattern, KxPatternParentheses):
+        return _at_start(kx_pattern._sub_pattern)
+    if isinstance(kx_pattern, KxPatternOr):
+        return _first_found(kx_pattern._sub_patterns, _at_start)
+    if isinstance(kx_pattern, KxPatternAnd):
+        sub_patterns = kx_pattern._sub_patterns
+        return _all([_found(kx_pattern), _any(_at_start(sub) for sub in sub_patterns)])
+    if isinstance(kx_pattern, KxPatternExcludes):
+        return _found(kx_pattern)
+    if isinstance(kx_pattern, KxPatternConcat):
+        full = _full(kx_pattern, False)
+        if full == "":
+            return _ALWAYS
+        return f"(?={full})"
+    raise KxRegexError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+
+def _at_origin(kx_pattern: KxPattern) -> str:
+    """Asserts at position 0 that kx_pattern.search() returns a match ending at 0.
+
+    An empty AND-pattern returns KxMatch(len + 1, -1), which also counts.
+    """
+    if isinstance(kx_pattern, KxPatternWildcard):
+        return _ALWAYS
+    if isinstance(kx_pattern, KxPatternChars):
+        return _ALWAYS if kx_pattern._pattern == "" else _NEVER
+    if isinstance(kx_pattern, KxPatternParentheses):
+        return _at_origin(kx_pattern._sub_pattern)
+    if isinstance(kx_pattern, KxPatternOr):
+        return _first_found(kx_pattern._sub_patterns, _at_origin)
+    if isinstance(kx_pattern, KxPatternAnd):
+        return _all(_at_origin(sub) for sub in kx_pattern._sub_patterns)
+    if isinstance(kx_pattern, KxPatternExcludes):
+        return _found(kx_pattern)
+    if isinstance(kx_pattern, KxPatternConcat):
+        # The leftmost-shortest match is empty iff the pattern matches "".
+        _full(kx_pattern, False)
+        return _ALWAYS if kx_pattern.full_match("") else _NEVER
+    raise KxRegexError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+
+def full_match_regex(kx_pattern: KxPattern) -> str:
+    """Returns the regex source equivalent to kx_pattern.full_match()."""
+    return _full(kx_pattern, True)
+
+
+def contains_match_regex(kx_pattern: KxPattern) -> str:
+    """Returns the regex source equivalent to kx_pattern.contains_match().
+
+    The regex is zero-width and must be applied with `re.Pattern.match()`.
+    """
+    return _found(kx_pattern)
+
+
+def _compile(source: str, as_bytes: bool, flags: int = re.DOTALL) -> re.Pattern:
+    # Literals are matched as their UTF-8 encoding in bytes mode.
+    if as_bytes:
+        return re.compile(source.encode("utf-8"), flags)
+    return re.compile(source, flags)
+
+
+def compile_regex(kx_pattern: KxPattern, as_bytes: bool = False) -> re.Pattern:
+    """Compiles kx_pattern into a regex to be used with `re.Pattern.fullmatch()`.
+
+    With as_bytes=True, the regex matches UTF-8 encoded keys.
+    """
+    return _compile(full_match_regex(kx_pattern), as_bytes)
+
+
+def compile_bounded_regex(
+    kx_pattern: KxPattern, as_bytes: bool = False
+) -> t.Optional[re.Pattern]:
+    """Like compile_regex(), but returns None instead of raising KxRegexError,
+    and for patterns whose regex source is longer than MAX_REGEX_SIZE.
+    """
+    try:
+        source = full_match_regex(kx_pattern)
+    except KxRegexError:
+        return None
+    if len(source) > MAX_REGEX_SIZE:
+        return None
+    return _compile(source, as_bytes)
+
+
+def compile_contains_regex(kx_pattern: KxPattern, as_bytes: bool = False) -> re.Pattern:
+    """Compiles kx_pattern into a regex to be used with `re.Pattern.match()`."""
+    return _compile(contains_match_regex(kx_pattern), as_bytes)
+
+
+def compile_line_regex(kx_pattern: KxPattern) -> re.Pattern:
+    """Compiles kx_pattern into a bytes regex that finds matching lines.
+
+    The regex is to be used with `re.Pattern.finditer()` over a buffer of
+    UTF-8 encoded, newline-delimited keys. Keys cannot contain newlines, so
+    wildcards and lookaheads are not allowed to cross them.
+    """
+    return _compile(f"^(?:{full_match_regex(kx_pattern)})$", True, re.MULTILINE)
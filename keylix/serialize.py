@@ -0,0 +1,303 @@
+"""Compact binary format of pattern trees and pattern bundles.
+
+A pattern record is a header (b"KXP" and the format version) followed by
+the tree in prefix order: one tag byte per node, then its characters or
+the number of its sub-patterns. Counts, lengths and offsets are unsigned
+LEB128 varints. An OR-pattern whose Aho-Corasick automaton was built is
+written with the automaton tables, so it is not rebuilt after loading.
+
+A bundle (b"KXB" and the format version) holds many named patterns: an
+index of names, offsets and lengths, followed by the tree records. Only
+the index is read when a bundle is opened; each tree is decoded the first
+time its name is looked up.
+"""
+
+import mmap
+import typing as t
+
+from keylix.ahocorasick import KxAhoCorasick
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternEmpty,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+)
+
+FORMAT_VERSION = 1
+
+_PATTERN_MAGIC = b"KXP"
+_BUNDLE_MAGIC = b"KXB"
+
+_TAG_WILDCARD = 0
+_TAG_CHARS = 1
+_TAG_EMPTY = 2
+_TAG_PARENTHESES = 3
+_TAG_EXCLUDES = 4
+_TAG_OR = 5
+_TAG_AND = 6
+_TAG_CONCAT = 7
+
+
+class KxFormatError(ValueError):
+    """Raised for data that is not a pattern record or bundle of this version."""
+
+
+def _write_varint(out: bytearray, value: int) -> None:
+    while value >= 0x80:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def _write_str(out: bytearray, text: str) -> None:
+    encoded = text.encode("utf-8")
+    _write_varint(out, len(encoded))
+    out += encoded
+
+
+def _write_ints(out: bytearray, values: t.Sequence[int]) -> None:
+    _write_varint(out, len(values))
+    for value in values:
+        _write_varint(out, value)
+
+
+class _Reader:
+    _data: t.Union[bytes, memoryview]
+    _pos: int
+
+    def __init__(self, data: t.Union[bytes, memoryview], pos: int = 0):
+        self._data = data
+        self._pos = pos
+
+    @property
+    def pos(self) -> int:
+        return self._pos
+
+    def byte(self) -> int:
+        if self._pos >= len(self._data):
+            raise KxFormatError("Unexpected end of data.")
+        value = self._data[self._pos]
+        self._pos += 1
+        return value
+
+    def varint(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            byte = self.byte()
+            value |= (byte & 0x7F) << shift
+            if byte < 0x80:
+                return value
+            shift += 7
+
+    def str(self) -> str:
+        length = self.varint()
+        end = self._pos + length
+        if end > len(self._data):
+            raise KxFormatError("Unexpected end of data.")
+        text = bytes(self._data[self._pos : end]).decode("utf-8")
+        self._pos = end
+        return text
+
+    def ints(self) -> t.List[int]:
+        return [self.varint() for _ in range(self.varint())]
+
+    def header(self, magic: bytes) -> None:
+        found = bytes(self._data[self._pos : self._pos + len(magic)])
+        if found != magic:
+            raise KxFormatError(f"Missing {magic!r} header.")
+        self._pos += len(magic)
+        version = self.byte()
+        if version != FORMAT_VERSION:
+            raise KxFormatError(f"Unsupported format version {version}.")
+
+
+def _write_automaton(out: bytearray, automaton: KxAhoCorasick) -> None:
+    _write_varint(out, len(automaton._goto))
+    for goto, fail, terminal, output in zip(
+        automaton._goto, automaton._fail, automaton._terminal, automaton._output
+    ):
+        _write_varint(out, len(goto))
+        for char, next_state in goto.items():
+            _write_varint(out, ord(char))
+            _write_varint(out, next_state)
+        _write_varint(out, fail)
+        _write_ints(out, terminal)
+        _write_ints(out, output)
+
+
+def _read_automaton(reader: _Reader, literals: t.List[str]) -> KxAhoCorasick:
+    automaton = KxAhoCorasick.__new__(KxAhoCorasick)
+    automaton._lengths = [len(literal) for literal in literals]
+    automaton._goto = []
+    automaton._fail = []
+    automaton._terminal = []
+    automaton._output = []
+    for _ in range(reader.varint()):
+        automaton._goto.append(
+            {chr(reader.varint()): reader.varint() for _ in range(reader.varint())}
+        )
+        automaton._fail.append(reader.varint())
+        automaton._terminal.append(reader.ints())
+        automaton._output.append(reader.ints())
+    return automaton
+
+
+def _write_pattern(out: bytearray, kx_pattern: KxPattern) -> None:
+    if isinstance(kx_pattern, KxPatternWildcard):
+        out.append(_TAG_WILDCARD)
+    elif isinstance(kx_pattern, KxPatternEmpty):
+        out.append(_TAG_EMPTY)
+    elif isinstance(kx_pattern, KxPatternChars):
+        out.append(_TAG_CHARS)
+        _write_str(out, kx_pattern._pattern)
+    elif isinstance(kx_pattern, KxPatternParentheses):
+        out.append(_TAG_PARENTHESES)
+        _write_pattern(out, kx_pattern._sub_pattern)
+    elif isinstance(kx_pattern, KxPatternExcludes):
+        out.append(_TAG_EXCLUDES)
+        _write_pattern(out, kx_pattern._sub_pattern)
+    elif isinstance(kx_pattern, (KxPatternOr, KxPatternAnd, KxPatternConcat)):
+        if isinstance(kx_pattern, KxPatternOr):
+            out.append(_TAG_OR)
+        elif isinstance(kx_pattern, KxPatternAnd):
+            out.append(_TAG_AND)
+        else:
+            out.append(_TAG_CONCAT)
+        _write_varint(out, len(kx_pattern._sub_patterns))
+        for sub_pattern in kx_pattern._sub_patterns:
+            _write_pattern(out, sub_pattern)
+        if isinstance(kx_pattern, KxPatternOr):
+            if kx_pattern._automaton is None:
+                out.append(0)
+            else:
+                out.append(1)
+                _write_automaton(out, kx_pattern._automaton)
+    else:
+        raise TypeError(f"Unsupported pattern type: {type(kx_pattern).__name__}.")
+
+
+def _read_pattern(reader: _Reader) -> KxPattern:
+    tag = reader.byte()
+    if tag == _TAG_WILDCARD:
+        return KxPatternWildcard()
+    if tag == _TAG_EMPTY:
+        return KxPatternEmpty()
+    if tag == _TAG_CHARS:
+        return KxPatternChars(reader.str())
+    if tag == _TAG_PARENTHESES:
+        return KxPatternParentheses(_read_pattern(reader))
+    if tag == _TAG_EXCLUDES:
+        return KxPatternExcludes(_read_pattern(reader))
+    if tag in (_TAG_OR, _TAG_AND, _TAG_CONCAT):
+        sub_patterns = [_read_pattern(reader) for _ in range(reader.varint())]
+        if tag == _TAG_AND:
+            return KxPatternAnd(sub_patterns)
+        if tag == _TAG_CONCAT:
+            return KxPatternConcat(sub_patterns)
+        kx_pattern = KxPatternOr(sub_patterns)
+        if reader.byte() == 1:
+            if kx_pattern._literals is None:
+                raise KxFormatError("Automaton of an OR-pattern without literals.")
+            kx_pattern._automaton = _read_automaton(reader, kx_pattern._literals)
+        return kx_pattern
+    raise KxFormatError(f"Unknown node tag {tag}.")
+
+
+def dumps(kx_pattern: KxPattern) -> bytes:
+    """Returns the pattern record of kx_pattern."""
+    out = bytearray(_PATTERN_MAGIC)
+    out.append(FORMAT_VERSION)
+    _write_pattern(out, kx_pattern)
+    return bytes(out)
+
+
+def loads(data: t.Union[bytes, bytearray, memoryview]) -> KxPattern:
+    """Returns the pattern tree of a record created by dumps()."""
+    reader = _Reader(memoryview(data))
+    reader.header(_PATTERN_MAGIC)
+    return _read_pattern(reader)
+
+
+def dump_bundle(kx_patterns: t.Mapping[str, KxPattern]) -> bytes:
+    """Returns a bundle of the named patterns."""
+    trees = bytearray()
+    index = bytearray()
+    _write_varint(index, len(kx_patterns))
+    for name, kx_pattern in kx_patterns.items():
+        start = len(trees)
+        _write_pattern(trees, kx_pattern)
+        _write_str(index, name)
+        _write_varint(index, start)
+        _write_varint(index, len(trees) - start)
+    out = bytearray(_BUNDLE_MAGIC)
+    out.append(FORMAT_VERSION)
+    return bytes(out + index + trees)
+
+
+class KxPatternBundle(t.Mapping[str, KxPattern]):
+    """A read-only mapping of names to the patterns of a bundle.
+
+    Each tree is decoded on first access and then kept. A bundle opened
+    with open() maps the file; close() releases it.
+    """
+
+    _data: memoryview
+    _index: t.Dict[str, t.Tuple[int, int]]
+    _patterns: t.Dict[str, KxPattern]
+    _mmap: t.Union[mmap.mmap, None]
+
+    def __init__(self, data: t.Union[bytes, bytearray, memoryview]):
+        self._data = memoryview(data)
+        self._patterns = {}
+        self._mmap = None
+        reader = _Reader(self._data)
+        reader.header(_BUNDLE_MAGIC)
+        entries = [
+            (reader.str(), reader.varint(), reader.varint())
+            for _ in range(reader.varint())
+        ]
+        trees_start = reader.pos
+        self._index = {
+            name: (trees_start + start, length) for name, start, length in entries
+        }
+
+    @classmethod
+    def open(cls, path: str) -> "KxPatternBundle":
+        with open(path, "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        bundle = cls(mapped)
+        bundle._mmap = mapped
+        return bundle
+
+    def close(self) -> None:
+        if self._mmap is not None:
+            self._data.release()
+            self._mmap.close()
+            self._mmap = None
+
+    def __enter__(self) -> "KxPatternBundle":
+        return self
+
+    def __exit__(self, *exc_info: t.Any) -> None:
+        self.close()
+
+    def __getitem__(self, name: str) -> KxPattern:
+        kx_pattern = self._patterns.get(name)
+        if kx_pattern is None:
+            start, length = self._index[name]
+            reader = _Reader(self._data[: start + length], start)
+            kx_pattern = _read_pattern(reader)
+            self._patterns[name] = kx_pattern
+        return kx_pattern
+
+    def __iter__(self) -> t.Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
@@ -0,0 +1,52 @@
+import unittest
+
+from keylix.ahocorasick import KxAhoCorasick
+
+
+class TestKxAhoCorasick(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.automaton = KxAhoCorasick(["he", "she", "his", "hers", "e"])
+
+    def test_search_first_01(self):
+        # The literal with the lowest index wins over earlier occurrences.
+        self.assertEqual(self.automaton.search_first("ushers", 0, 6), (0, 2, 4))
+        self.assertEqual(self.automaton.search_first("ushe", 0, 4), (0, 2, 4))
+        self.assertEqual(self.automaton.search_first("this", 0, 4), (2, 1, 4))
+        self.assertEqual(self.automaton.search_first("ee", 1, 2), (4, 1, 2))
+        self.assertIsNone(self.automaton.search_first("xyz", 0, 3))
+
+    def test_search_first_02(self):
+        # Matches must be inside string[pos:endpos].
+        self.assertEqual(self.automaton.search_first("ushers", 3, 6), (4, 3, 4))
+        self.assertIsNone(self.automaton.search_first("ushers", 4, 6))
+
+    def test_search_first_03(self):
+        automaton = KxAhoCorasick(["abc", "", "b"])
+        self.assertEqual(automaton.search_first("xabc", 0, 4), (0, 1, 4))
+        self.assertEqual(automaton.search_first("xab", 1, 3), (1, 1, 1))
+
+    def test_find_all_01(self):
+        self.assertEqual(self.automaton.find_all("ushers", 0, 6), {0, 1, 3, 4})
+        self.assertEqual(self.automaton.find_all("ushers", 0, 4), {0, 1, 4})
+        self.assertEqual(self.automaton.find_all("xyz", 0, 3), set())
+
+    def test_full_match_01(self):
+        self.assertTrue(self.automaton.full_match("hers", 0, 4))
+        self.assertTrue(self.automaton.full_match("ushe", 1, 4))
+        self.assertFalse(self.automaton.full_match("hers", 0, 3))
+        self.assertFalse(self.automaton.full_match("", 0, 0))
+
+    def test_prefix_ends_01(self):
+        self.assertEqual(self.automaton.prefix_ends("xhersx", 1, 6), {3, 5})
+        self.assertEqual(self.automaton.prefix_ends("xhersx", 1, 4), {3})
+
+    def test_find_any_01(self):
+        self.assertTrue(self.automaton.find_any("ushers", 0, 6))
+        self.assertFalse(self.automaton.find_any("ushers", 0, 1))
+        self.assertFalse(self.automaton.find_any("xyz", 0, 3))
+        self.assertTrue(KxAhoCorasick(["a", ""]).find_any("xyz", 5, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import concurrent.futures
+import typing as t
+import unittest
+
+from keylix.aio import afilter
+from keylix.parser import parse
+
+PAGES = [
+    ["apples", "green apples", "apple pie"],
+    [],
+    ["cherries", "cherry pie", "fruit salad", "peanut salad"],
+    ["pineapples", "pineapples and peanuts"],
+]
+
+
+async def list_keys(pages: t.List[t.List[str]]) -> t.AsyncIterator[str]:
+    """Simulates a paginated listing"""
+
+    for page in pages:
+        await asyncio.sleep(0)
+        for key in page:
+            yield key
+
+
+class TestAfilter(unittest.IsolatedAsyncioTestCase):
+    async def test_afilter_01(self):
+        kx_pattern = parse("*apple*")
+        result = [key async for key in afilter(kx_pattern, list_keys(PAGES))]
+        self.assertEqual(
+            result,
+            [
+                "apples",
+                "green apples",
+                "apple pie",
+                "pineapples",
+                "pineapples and peanuts",
+            ],
+        )
+
+    async def test_afilter_02(self):
+        # Small queues and batches do not change the results.
+        kx_pattern = parse("*pie | *salad")
+        result = [
+            key
+            async for key in afilter(
+                kx_pattern, list_keys(PAGES), batch_size=1, max_pending=1
+            )
+        ]
+        self.assertEqual(
+            result, ["apple pie", "cherry pie", "fruit salad", "peanut salad"]
+        )
+
+    async def test_afilter_03(self):
+        # Large batches are filtered in the executor.
+        kx_pattern = parse("*s")
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            result = [
+                key
+                async for key in afilter(
+                    kx_pattern,
+                    list_keys(PAGES),
+                    executor=executor,
+                    executor_min_batch=1,
+                )
+            ]
+        self.assertEqual(
+            result,
+            [
+                "apples",
+                "green apples",
+                "cherries",
+                "pineapples",
+                "pineapples and peanuts",
+            ],
+        )
+
+    async def test_afilter_04(self):
+        # Errors of the key source are raised to the consumer.
+        async def failing_keys() -> t.AsyncIterator[str]:
+            yield "apples"
+            raise RuntimeError("listing failed")
+
+        with self.assertRaises(RuntimeError):
+            async for _ in afilter(parse("*"), failing_keys()):
+                pass
+
+    async def test_afilter_05(self):
+        # Closing the filter early stops reading the key source.
+        filtered = afilter(parse("*"), list_keys(PAGES * 100))
+        self.assertEqual(await filtered.__anext__(), "apples")
+        await filtered.aclose()
+
+    async def test_afilter_06(self):
+        # With the default settings, full batches go to the executor.
+        class CountingExecutor(concurrent.futures.ThreadPoolExecutor):
+            submits = 0
+
+            def submit(
+                self, *args: t.Any, **kwargs: t.Any
+            ) -> concurrent.futures.Future:
+                self.submits += 1
+                return super().submit(*args, **kwargs)
+
+        keys = [f"key-{i}" for i in range(5000)]
+        with CountingExecutor(1) as executor:
+            result = [
+                key
+                async for key in afilter(
+                    parse("*7"), list_keys([keys]), executor=executor
+                )
+            ]
+        self.assertEqual(result, [key for key in keys if key.endswith("7")])
+        self.assertGreater(executor.submits, 0)
+
+    async def test_afilter_07(self):
+        with self.assertRaises(ValueError):
+            async for _ in afilter(
+                parse("*"), list_keys(PAGES), batch_size=10, executor_min_batch=11
+            ):
+                pass
+
+
+if __name__ == "__main__":
+    unittest.main()
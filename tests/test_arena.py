@@ -0,0 +1,83 @@
+import pickle
+import unittest
+from unittest import mock
+
+from keylix.arena import KxKeyArena
+from keylix.core import KxPatternChars, KxPatternConcat, KxPatternExcludes
+from keylix.parser import parse
+from keylix.regex import compile_bounded_regex
+
+KEYS = ["cherry pie", "", "potato salad", "crème brûlée", "peanut salad"]
+
+
+class TestKxKeyArena(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.arena = KxKeyArena.create(KEYS)
+        self.addCleanup(self.arena.unlink)
+        self.addCleanup(self.arena.close)
+
+    def test_keys_01(self):
+        self.assertEqual(len(self.arena), len(KEYS))
+        self.assertEqual(list(self.arena), KEYS)
+        self.assertEqual(self.arena[-1], "peanut salad")
+        with self.assertRaises(IndexError):
+            self.arena[len(KEYS)]
+
+    def test_filter_arena_01(self):
+        for text in ["*salad", "* & ~(*peanut*)", "", "*è*", "*"]:
+            kx_pattern = parse(text)
+            with self.subTest(pattern=text):
+                self.assertEqual(
+                    list(kx_pattern.filter_arena(self.arena)),
+                    [i for i, key in enumerate(KEYS) if kx_pattern.full_match(key)],
+                )
+
+    def test_filter_arena_02(self):
+        kx_pattern = parse("*salad")
+        self.assertEqual(list(kx_pattern.filter_arena(self.arena, 0, 3)), [2])
+        self.assertEqual(list(kx_pattern.filter_arena(self.arena, 3)), [4])
+
+    def test_filter_arena_03(self):
+        # Patterns without a regex are matched by the pattern tree.
+        kx_pattern = KxPatternConcat(
+            [KxPatternChars("p"), KxPatternExcludes(KxPatternChars("nut"))]
+        )
+        self.assertEqual(list(kx_pattern.filter_arena(self.arena)), [2])
+
+    def test_filter_arena_04(self):
+        # The regex is compiled once and kept on the pattern.
+        kx_pattern = parse("*salad")
+        with mock.patch(
+            "keylix.regex.compile_bounded_regex",
+            wraps=compile_bounded_regex,
+        ) as compile_mock:
+            for _ in range(3):
+                self.assertEqual(list(kx_pattern.filter_arena(self.arena)), [2, 4])
+        self.assertEqual(compile_mock.call_count, 1)
+
+    def test_filter_arena_05(self):
+        # A wide OR inside an AND has a regex too large to compile; the
+        # pattern tree is used instead.
+        literals = "|".join(f"tenant-{i:05d}" for i in range(1000))
+        kx_pattern = parse(f"({literals}) & *5*")
+        self.assertIsNone(kx_pattern.bytes_regex())
+        with KxKeyArena.create(["tenant-00005", "tenant-x", "tenant-00010"]) as arena:
+            self.assertEqual(list(kx_pattern.filter_arena(arena)), [0])
+            arena.unlink()
+
+    def test_attach_01(self):
+        # A pickled arena attaches to the same shared memory.
+        with pickle.loads(pickle.dumps(self.arena)) as attached:
+            self.assertEqual(attached.name, self.arena.name)
+            self.assertEqual(list(attached), KEYS)
+
+    def test_empty_01(self):
+        with KxKeyArena.create([]) as arena:
+            self.assertEqual(len(arena), 0)
+            self.assertEqual(list(parse("*").filter_arena(arena)), [])
+            arena.unlink()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import unittest
+from unittest import mock
+
+from keylix.core import KxPatternConcat
+from keylix.parser import parse
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover
+    np = None
+
+KEYS = [
+    "",
+    "apples",
+    "green apples",
+    "apple pie",
+    "cherries",
+    "cherry pie",
+    "fruit salad",
+    "peanut salad",
+    "pineapples",
+    "pineapples and peanuts",
+    "pies and apples",
+]
+
+PATTERNS = [
+    "",
+    "*",
+    "apples",
+    "apple*",
+    "*pie",
+    "*apple*",
+    "*e*s",
+    "a*p*e*",
+    "cherr*(|ies)",
+    "apples | cherries | *pie",
+    "pineapples & ~(peanuts)",
+    "*salad & ~(*peanut*)",
+    "~(apple)",
+    "pie & apple",
+    "( apple | ( *salad & ~(*peanut*) ) )",
+    "*pie* & ~(ap*e*s)",
+    "pi*s & *and*",
+]
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class TestBatch(unittest.TestCase):
+    def test_match_many_01(self):
+        for text in PATTERNS:
+            kx_pattern = parse(text)
+            expected = [kx_pattern.full_match(key) for key in KEYS]
+            self.assertEqual(kx_pattern.match_many(KEYS).tolist(), expected, text)
+
+    def test_match_many_02(self):
+        keys = np.array(KEYS)
+        mask = parse("*apple*").match_many(keys)
+        self.assertEqual(mask.dtype, bool)
+        self.assertEqual(
+            keys[mask].tolist(),
+            [
+                "apples",
+                "green apples",
+                "apple pie",
+                "pineapples",
+                "pineapples and peanuts",
+                "pies and apples",
+            ],
+        )
+
+    def test_search_many_01(self):
+        for text in PATTERNS:
+            kx_pattern = parse(text)
+            starts, ends = kx_pattern.search_many(KEYS)
+            for key, start, end in zip(KEYS, starts, ends):
+                kx_match = kx_pattern.search(key)
+                if kx_match is None:
+                    self.assertEqual(start, -1, f'{text}: "{key}"')
+                else:
+                    self.assertEqual(
+                        (start, end), (kx_match.start, kx_match.end), f'{text}: "{key}"'
+                    )
+
+    def test_search_many_02(self):
+        # Concat-patterns of characters and wildcards are searched without
+        # calling search() per key.
+        kx_pattern = parse("*salad & ~(*peanut*)")
+        with mock.patch.object(
+            KxPatternConcat, "search", side_effect=AssertionError("per-key search")
+        ):
+            mask = kx_pattern.match_many(KEYS)
+        self.assertEqual(mask.tolist(), [kx_pattern.full_match(key) for key in KEYS])
+
+    def test_empty_01(self):
+        self.assertEqual(parse("*apple*").match_many([]).tolist(), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
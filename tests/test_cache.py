@@ -0,0 +1,72 @@
+import pickle
+import unittest
+
+from keylix.cache import KxCachedPattern, KxCacheInfo
+from keylix.parser import compile
+
+
+class TestKxCachedPattern(unittest.TestCase):
+    def test_full_match_01(self):
+        cached_pattern = KxCachedPattern(compile("*pie"), maxsize=2)
+        self.assertTrue(cached_pattern.full_match("cherry pie"))
+        self.assertTrue(cached_pattern.full_match("cherry pie"))
+        self.assertFalse(cached_pattern.full_match("cherry"))
+        self.assertFalse(cached_pattern.full_match("cherry"))
+        self.assertEqual(cached_pattern.cache_info(), KxCacheInfo(2, 2, 0, 2, 2))
+
+    def test_contains_match_01(self):
+        cached_pattern = KxCachedPattern(compile("pie"))
+        self.assertTrue(cached_pattern.contains_match("cherry pie"))
+        self.assertFalse(cached_pattern.full_match("cherry pie"))
+        self.assertTrue(cached_pattern.contains_match("cherry pie"))
+        self.assertEqual(cached_pattern.cache_info().hits, 1)
+
+    def test_eviction_01(self):
+        cached_pattern = KxCachedPattern(compile("a*"), maxsize=2)
+        cached_pattern.full_match("a")
+        cached_pattern.full_match("b")
+        cached_pattern.full_match("a")
+        # "b" is the least recently used key.
+        cached_pattern.full_match("c")
+        self.assertEqual(cached_pattern.cache_info(), KxCacheInfo(1, 3, 1, 2, 2))
+        cached_pattern.full_match("a")
+        self.assertEqual(cached_pattern.cache_info().hits, 2)
+        cached_pattern.full_match("b")
+        self.assertEqual(cached_pattern.cache_info().misses, 4)
+
+    def test_eviction_02(self):
+        # Both methods share the maxsize entries.
+        cached_pattern = KxCachedPattern(compile("a*"), maxsize=2)
+        cached_pattern.full_match("a")
+        cached_pattern.contains_match("a")
+        cached_pattern.full_match("b")
+        self.assertEqual(cached_pattern.cache_info(), KxCacheInfo(0, 3, 1, 2, 2))
+        cached_pattern.contains_match("a")
+        self.assertEqual(cached_pattern.cache_info().hits, 1)
+        cached_pattern.full_match("a")
+        self.assertEqual(cached_pattern.cache_info(), KxCacheInfo(1, 4, 2, 2, 2))
+
+    def test_pass_through_01(self):
+        cached_pattern = KxCachedPattern(compile("b"))
+        self.assertTrue(cached_pattern.full_match("abc", 1, 2))
+        self.assertTrue(cached_pattern.full_match(bytearray(b"b")))
+        self.assertEqual(cached_pattern.cache_info(), KxCacheInfo(0, 0, 0, 100000, 0))
+
+    def test_cache_clear_01(self):
+        cached_pattern = KxCachedPattern(compile("a"))
+        cached_pattern.full_match("a")
+        cached_pattern.cache_clear()
+        self.assertEqual(cached_pattern.cache_info(), KxCacheInfo(0, 0, 0, 100000, 0))
+
+    def test_cached_01(self):
+        # The cache is attached to the compiled pattern.
+        cached_pattern = compile("*pie").cached(maxsize=10)
+        self.assertIs(compile("*pie").cached(), cached_pattern)
+        self.assertEqual(cached_pattern.cache_info().maxsize, 10)
+
+    def test_pickle_01(self):
+        cached_pattern = KxCachedPattern(compile("a"), maxsize=5)
+        cached_pattern.full_match("a")
+        copy = pickle.loads(pickle.dumps(cached_pattern))
+        self.assertEqual(copy.cache_info(), KxCacheInfo(0, 0, 0, 5, 0))
+        self.assertTrue(copy.full_match("a"))
@@ -0,0 +1,73 @@
+import pickle
+import unittest
+
+from keylix.codegen import compile_function, generate_source
+from keylix.parser import compile, parse
+
+PATTERNS = [
+    "",
+    "*",
+    "cherry",
+    "*pie",
+    "cherry*",
+    "*a*",
+    "a*b*c",
+    "*/users/*/profile*",
+    "cherr*(|y)pie",
+    "cherry|apple|pie",
+    "~(peanut)",
+    "~(*)",
+    "pineapples&~(peanuts)",
+    "( *salad & ~(*peanut*) ) | apples",
+    "*~(a)*",
+]
+
+KEYS = [
+    "",
+    "a",
+    "abc",
+    "axbxc",
+    "cherry",
+    "cherry pie",
+    "cherrpie",
+    "apple",
+    "peanut",
+    "pineapples",
+    "potato salad",
+    "peanut salad",
+    "apples",
+    "t/users/u1/profile",
+    "t/users/profile",
+]
+
+
+class TestCompileFunction(unittest.TestCase):
+    def test_compile_function_01(self):
+        for text in PATTERNS:
+            kx_pattern = parse(text)
+            function = compile_function(kx_pattern)
+            for key in KEYS:
+                with self.subTest(pattern=text, key=key):
+                    self.assertEqual(function(key), kx_pattern.full_match(key))
+
+    def test_generate_source_01(self):
+        # Globs become string method calls, without calls into the tree.
+        source = generate_source(parse("*/users/*/profile*"))
+        self.assertIn("s.find('/users/'", source)
+        self.assertNotIn("_c0", source)
+        self.assertIn("s.endswith('pie')", generate_source(parse("cherry*pie")))
+        self.assertIn("s in _c0", generate_source(parse("a|b|c")))
+
+    def test_full_match_function_01(self):
+        kx_pattern = compile("*salad|apples")
+        function = kx_pattern.full_match_function()
+        self.assertIs(kx_pattern.full_match_function(), function)
+        self.assertTrue(function("potato salad"))
+        self.assertFalse(function("pears"))
+        # The generated function is not pickled with the pattern.
+        copy = pickle.loads(pickle.dumps(kx_pattern))
+        self.assertTrue(copy.full_match_function()("apples"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,10 @@
+import time
 import typing as t
 import unittest
+from unittest import mock
 
 from keylix.core import (
+    AHO_CORASICK_MIN_SUB_PATTERNS,
     KxMatch,
     KxPattern,
     KxPatternAnd,
@@ -9,6 +12,7 @@ from keylix.core import (
     KxPatternConcat,
     KxPatternExcludes,
     KxPatternOr,
+    KxPatternParentheses,
     KxPatternWildcard,
 )
 
@@ -642,6 +646,30 @@ class TestKxPatternOr(TestKxPattern):
             ],
         )
 
+    def test_literals_01(self):
+        # OR-patterns of characters full-match with a trie, and large ones
+        # search with an Aho-Corasick automaton.
+        for count in [20, AHO_CORASICK_MIN_SUB_PATTERNS]:
+            literals = [f"tenant-{i}" for i in range(count)] + ["", "ant"]
+            kx_pattern = KxPatternOr([KxPatternChars(lit) for lit in literals])
+            reference = KxPatternOr(
+                [KxPatternParentheses(KxPatternChars(lit)) for lit in literals]
+            )
+
+            for string in ["", "tenant-1", "tenant-12", "xtenant-7y", "an ant", "x"]:
+                self.assertEqual(
+                    kx_pattern.full_match(string), reference.full_match(string), string
+                )
+                kx_match = kx_pattern.search(string)
+                reference_match = reference.search(string)
+                self.assertEqual(
+                    (kx_match.start, kx_match.end),
+                    (reference_match.start, reference_match.end),
+                    string,
+                )
+            self.assertIsNotNone(kx_pattern._automaton)
+            self.assertFalse(kx_pattern.full_match("ant", 4, 3))
+
 
 class TestKxPatternAnd(unittest.TestCase):
     def _test_search_01(self):
@@ -763,6 +791,357 @@ class TestKxPatternConcat(TestKxPattern):
             ],
         )
 
+    def test_full_match_07(self):
+        # pattern: concat( * . "ab" . * . "cd" ) on keys longer than 100 chars
+        kx_pattern = KxPatternConcat(
+            [
+                KxPatternWildcard(),
+                KxPatternChars("ab"),
+                KxPatternWildcard(),
+                KxPatternChars("cd"),
+            ]
+        )
+
+        self.run_full_match_tests(
+            kx_pattern,
+            matching=["x" * 500 + "ab" + "y" * 500 + "cd", "abcd" * 200],
+            not_matching=["x" * 500 + "cd" + "y" * 500 + "ab", "ab" * 500],
+        )
+
+    def test_search_03(self):
+        # pattern: concat( "ab" . * . "cd" ) - the leftmost, shortest match
+        kx_pattern = KxPatternConcat(
+            [KxPatternChars("ab"), KxPatternWildcard(), KxPatternChars("cd")]
+        )
+
+        self.run_search_tests(
+            kx_pattern,
+            {
+                "": None,
+                "abcd": KxMatch(0, 4),
+                "xabycdzcd": KxMatch(1, 6),
+                "cdab": None,
+            },
+        )
+
+    def test_full_match_ends_01(self):
+        # pattern: concat( "a" . * . "b" )
+        kx_pattern = KxPatternConcat(
+            [KxPatternChars("a"), KxPatternWildcard(), KxPatternChars("b")]
+        )
+        self.assertEqual(kx_pattern.full_match_ends("xabab", 1, 5), {3, 5})
+        self.assertEqual(kx_pattern.full_match_ends("xabab", 1, 4), {3})
+        self.assertEqual(kx_pattern.full_match_ends("xabab", 0, 5), set())
+
+
+class TestKxPatternOffsets(unittest.TestCase):
+    def test_search_01(self):
+        # pattern: "ab"
+        kx_pattern = KxPatternChars("ab")
+        kx_match = kx_pattern.search("ab ab ab", 1)
+        self.assertEqual((kx_match.start, kx_match.end), (3, 5))
+        self.assertIsNone(kx_pattern.search("ab ab ab", 1, 4))
+
+    def test_search_02(self):
+        # pattern: concat( * . "ab" . * )
+        kx_pattern = KxPatternConcat(
+            [KxPatternWildcard(), KxPatternChars("ab"), KxPatternWildcard()]
+        )
+        kx_match = kx_pattern.search("xab yab", 3)
+        self.assertEqual((kx_match.start, kx_match.end), (3, 7))
+
+    def test_full_match_01(self):
+        # pattern: or( "ab" | concat( "c" . * ) )
+        kx_pattern = KxPatternOr(
+            [
+                KxPatternChars("ab"),
+                KxPatternConcat([KxPatternChars("c"), KxPatternWildcard()]),
+            ]
+        )
+        self.assertTrue(kx_pattern.full_match("xaby", 1, 3))
+        self.assertFalse(kx_pattern.full_match("xaby", 1))
+        self.assertTrue(kx_pattern.full_match("xcdy", 1))
+        self.assertFalse(kx_pattern.full_match("xcdy", 0))
+
+    def test_contains_match_01(self):
+        # pattern: and( "ab" & ~( "cd" ) )
+        kx_pattern = KxPatternAnd(
+            [KxPatternChars("ab"), KxPatternExcludes(KxPatternChars("cd"))]
+        )
+        self.assertTrue(kx_pattern.contains_match("cd ab", 2))
+        self.assertFalse(kx_pattern.contains_match("cd ab", 0, 4))
+
+    def test_finditer_01(self):
+        # pattern: "aa"
+        kx_pattern = KxPatternChars("aa")
+        self.assertEqual(
+            [(m.start, m.end) for m in kx_pattern.finditer("aaa baa")],
+            [(0, 2), (1, 3), (5, 7)],
+        )
+        self.assertEqual(
+            [(m.start, m.end) for m in kx_pattern.search_all("aaa baa", 2, 6)],
+            [],
+        )
+
+
+class TestKxPatternConcatLongKeys(unittest.TestCase):
+    # search() and contains_match() must take about linear time; trying each
+    # start separately takes seconds on this key.
+    KEY = "abcdefghij" * 500
+
+    def setUp(self):
+        super().setUp()
+        # pattern: concat( * . "error" . * )
+        self.kx_pattern = KxPatternConcat(
+            [KxPatternWildcard(), KxPatternChars("error"), KxPatternWildcard()]
+        )
+
+    def test_contains_match_01(self):
+        start = time.perf_counter()
+        self.assertFalse(self.kx_pattern.contains_match(self.KEY))
+        self.assertTrue(KxPatternExcludes(self.kx_pattern).full_match(self.KEY))
+        self.assertLess(time.perf_counter() - start, 0.5)
+
+    def test_search_01(self):
+        key = self.KEY + "error" + self.KEY
+        start = time.perf_counter()
+        self.assertIsNone(self.kx_pattern.search(self.KEY))
+        kx_match = self.kx_pattern.search(key)
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual((kx_match.start, kx_match.end), (0, len(self.KEY) + 5))
+
+
+class TestKxPatternFastPaths(unittest.TestCase):
+    # full_match() and contains_match() must agree with search().
+    KEYS = ["", "ab", "xab", "abx", "peanuts", "pineapples"]
+
+    def assert_same_as_search(self, kx_pattern: KxPattern):
+        for key in self.KEYS:
+            for pos in range(len(key) + 2):
+                with self.subTest(pattern=str(kx_pattern), key=key, pos=pos):
+                    kx_match = kx_pattern.search(key, pos)
+                    self.assertEqual(
+                        kx_pattern.contains_match(key, pos), kx_match is not None
+                    )
+
+    def test_contains_match_01(self):
+        self.assert_same_as_search(KxPatternChars("ab"))
+        self.assert_same_as_search(KxPatternChars(""))
+        self.assert_same_as_search(KxPatternWildcard())
+        self.assert_same_as_search(
+            KxPatternOr([KxPatternChars(c) for c in ["", "a", "b", "x", "p", "q"] * 2])
+        )
+        self.assert_same_as_search(
+            KxPatternAnd(
+                [
+                    KxPatternChars("pineapples"),
+                    KxPatternExcludes(KxPatternChars("peanuts")),
+                ]
+            )
+        )
+        self.assert_same_as_search(
+            KxPatternConcat([KxPatternChars("a"), KxPatternWildcard()])
+        )
+
+    def test_full_match_01(self):
+        # pattern: and( "b" & * )
+        kx_pattern = KxPatternAnd([KxPatternChars("b"), KxPatternWildcard()])
+        self.assertTrue(kx_pattern.full_match("ab"))
+        self.assertFalse(kx_pattern.full_match("ab", 3))
+        self.assertFalse(KxPatternAnd([]).full_match("ab"))
+        self.assertFalse(KxPatternChars("").full_match("ab", 3))
+        self.assertFalse(KxPatternChars("").full_match(b"ab", 3))
+
+    def test_full_match_02(self):
+        # AND-patterns full-match without building KxMatch objects.
+        # pattern: and( *salad & ~( *peanut* ) & ( "a" | "f" ) )
+        kx_pattern = KxPatternAnd(
+            [
+                KxPatternConcat([KxPatternWildcard(), KxPatternChars("salad")]),
+                KxPatternExcludes(
+                    KxPatternConcat(
+                        [
+                            KxPatternWildcard(),
+                            KxPatternChars("peanut"),
+                            KxPatternWildcard(),
+                        ]
+                    )
+                ),
+                KxPatternOr([KxPatternChars("a"), KxPatternChars("f")]),
+            ]
+        )
+        keys = ["fruit salad", "peanut salad", "salad", "a salad", "fruit"]
+        expected = [
+            kx_pattern.search(key) is not None and kx_pattern.search(key).start == 0
+            for key in keys
+        ]
+        with mock.patch("keylix.core.KxMatch", side_effect=AssertionError("KxMatch")):
+            self.assertEqual([kx_pattern.full_match(key) for key in keys], expected)
+        self.assertEqual(expected, [True, True, True, True, False])
+
+    def test_match_01(self):
+        kx_match = KxMatch(1, 2)
+        self.assertFalse(hasattr(kx_match, "__dict__"))
+
+
+class TestKxPatternAndOrder(unittest.TestCase):
+    def test_static_order_01(self):
+        # pattern: and( concat( * . "a" . * ) & "b" )
+        concat = KxPatternConcat(
+            [KxPatternWildcard(), KxPatternChars("a"), KxPatternWildcard()]
+        )
+        chars = KxPatternChars("b")
+        kx_pattern = KxPatternAnd([concat, chars])
+        self.assertEqual(kx_pattern._ordered, [chars, concat])
+        self.assertEqual(kx_pattern._sub_patterns, [concat, chars])
+
+    def test_adaptive_order_01(self):
+        # pattern: and( "a" & "b" )
+        a = KxPatternChars("a")
+        b = KxPatternChars("b")
+        kx_pattern = KxPatternAnd([a, b])
+        self.assertEqual(kx_pattern._ordered, [a, b])
+        keys = ["ax", "ab", "xa", "aa"] * 500
+        results = [kx_pattern.full_match(key) for key in keys]
+        # "b" rejects most keys, so it is tried first.
+        self.assertEqual(kx_pattern._ordered, [b, a])
+        self.assertEqual(results, [False, True, False, False] * 500)
+        kx_match = kx_pattern.search("xbxa")
+        self.assertEqual((kx_match.start, kx_match.end), (1, 4))
+
+
+class TestKxPatternBytes(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        # pattern: or( concat( * . "brûlée" ) | and( "ab" & ~( "cd" ) ) )
+        self.kx_pattern = KxPatternOr(
+            [
+                KxPatternConcat([KxPatternWildcard(), KxPatternChars("brûlée")]),
+                KxPatternAnd(
+                    [KxPatternChars("ab"), KxPatternExcludes(KxPatternChars("cd"))]
+                ),
+            ]
+        )
+
+    def test_full_match_01(self):
+        for key in ["crème brûlée", "brûlée", "ab"]:
+            key = key.encode("utf-8")
+            for string in [key, bytearray(key), memoryview(key)]:
+                self.assertTrue(self.kx_pattern.full_match(string), string)
+
+        for key in ["crème brûlée!", "cd", "brulee"]:
+            key = key.encode("utf-8")
+            for string in [key, bytearray(key), memoryview(key)]:
+                self.assertFalse(self.kx_pattern.full_match(string), string)
+
+    def test_search_01(self):
+        # Offsets are byte offsets.
+        kx_match = KxPatternChars("brûlée").search("crème brûlée".encode("utf-8"))
+        self.assertEqual((kx_match.start, kx_match.end), (7, 15))
+        kx_match = KxPatternChars("ab").search(memoryview(b"xxabxx"), 1, 5)
+        self.assertEqual((kx_match.start, kx_match.end), (2, 4))
+
+
+class TestKxPatternOptimize(unittest.TestCase):
+    TEST_STRINGS = ["", "a", "ab", "abc", "cab", "abab", "xaby", "cd ab", "ab cd"]
+
+    def assert_equivalent(self, kx_pattern: KxPattern, expected: str) -> None:
+        """Checks the optimized tree and compares its results with the original"""
+
+        optimized = kx_pattern.optimize()
+        self.assertEqual(str(optimized), expected)
+        for string in self.TEST_STRINGS:
+            self.assertEqual(
+                optimized.full_match(string), kx_pattern.full_match(string), string
+            )
+            original_match = kx_pattern.search(string)
+            optimized_match = optimized.search(string)
+            if original_match is None:
+                self.assertIsNone(optimized_match, string)
+            else:
+                self.assertEqual(
+                    (optimized_match.start, optimized_match.end),
+                    (original_match.start, original_match.end),
+                    string,
+                )
+
+    def test_or_01(self):
+        # pattern: ( ( ab | ( cd ) ) | ab* )
+        kx_pattern = KxPatternOr(
+            [
+                KxPatternParentheses(
+                    KxPatternOr(
+                        [
+                            KxPatternChars("ab"),
+                            KxPatternParentheses(KxPatternChars("cd")),
+                        ]
+                    )
+                ),
+                KxPatternConcat([KxPatternChars("ab"), KxPatternWildcard()]),
+            ]
+        )
+        self.assert_equivalent(
+            kx_pattern, "( chars(ab)| chars(cd)| concat( chars(ab). * ) )"
+        )
+
+    def test_or_02(self):
+        # Sub-patterns after a wildcard are never needed.
+        kx_pattern = KxPatternOr(
+            [KxPatternChars("ab"), KxPatternWildcard(), KxPatternChars("cd")]
+        )
+        self.assert_equivalent(kx_pattern, "( chars(ab)| * )")
+        self.assert_equivalent(KxPatternOr([KxPatternWildcard()]), "*")
+
+    def test_concat_01(self):
+        # pattern: a(b)**(c)
+        kx_pattern = KxPatternConcat(
+            [
+                KxPatternChars("a"),
+                KxPatternParentheses(KxPatternChars("b")),
+                KxPatternWildcard(),
+                KxPatternChars(""),
+                KxPatternWildcard(),
+                KxPatternParentheses(KxPatternChars("c")),
+            ]
+        )
+        self.assert_equivalent(kx_pattern, "concat( chars(ab). *. chars(c) )")
+
+    def test_concat_02(self):
+        kx_pattern = KxPatternConcat(
+            [
+                KxPatternChars("a"),
+                KxPatternConcat([KxPatternChars("b"), KxPatternChars("")]),
+            ]
+        )
+        self.assert_equivalent(kx_pattern, "chars(ab)")
+        self.assert_equivalent(KxPatternConcat([]), "chars()")
+
+    def test_and_01(self):
+        # Redundant empty patterns are removed.
+        kx_pattern = KxPatternAnd(
+            [
+                KxPatternChars("ab"),
+                KxPatternChars(""),
+                KxPatternAnd([KxPatternChars(""), KxPatternChars("b")]),
+            ]
+        )
+        self.assert_equivalent(kx_pattern, "( chars(ab)& chars(b)& chars() )")
+
+    def test_and_02(self):
+        kx_pattern = KxPatternAnd(
+            [
+                KxPatternChars("ab"),
+                KxPatternChars(""),
+                KxPatternExcludes(KxPatternChars("cd")),
+            ]
+        )
+        self.assert_equivalent(kx_pattern, "( chars(ab)& ~(chars(cd)) )")
+
+    def test_unchanged_01(self):
+        kx_pattern = KxPatternConcat([KxPatternWildcard(), KxPatternChars("a")])
+        kx_pattern.optimize()
+        self.assertEqual(str(kx_pattern), "concat( *. chars(a) )")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from keylix.dfa import KxDfa
+from keylix.parser import compile
+
+
+class TestKxDfa(unittest.TestCase):
+    KEYS = [
+        "",
+        "cherry",
+        "cherry pie",
+        "apple pie",
+        "peanut salad",
+        "pineapples",
+        "pineapples and peanuts",
+        "potato salad",
+    ]
+
+    def assertSameAsPattern(self, text):
+        kx_pattern = compile(text)
+        dfa = KxDfa(kx_pattern)
+        for key in self.KEYS:
+            with self.subTest(pattern=text, key=key):
+                self.assertEqual(dfa.full_match(key), kx_pattern.full_match(key))
+
+    def test_full_match_01(self):
+        self.assertSameAsPattern("cherry")
+        self.assertSameAsPattern("*")
+        self.assertSameAsPattern("*pie")
+        self.assertSameAsPattern("cherry|*pie")
+        self.assertSameAsPattern("*a*(salad|pie)")
+
+    def test_full_match_02(self):
+        self.assertSameAsPattern("~(peanut)")
+        self.assertSameAsPattern("*~(peanut)*")
+        self.assertSameAsPattern("pineapples&~(peanuts)")
+        self.assertSameAsPattern("~(*a)")
+
+    def test_full_match_03(self):
+        dfa = KxDfa(compile("a*b"))
+        self.assertTrue(dfa.full_match("xaxbx", 1, 4))
+        self.assertFalse(dfa.full_match("xaxbx", 1))
+        self.assertFalse(dfa.full_match("xaxbx", 0, 4))
+
+    def test_max_states_01(self):
+        # The states are dropped once there are more than max_states.
+        dfa = KxDfa(compile("*a*b*c*"), max_states=3)
+        initial_states = len(dfa)
+        self.assertTrue(dfa.full_match("xaxbxcx"))
+        self.assertEqual(len(dfa), initial_states)
+        self.assertTrue(dfa.full_match("abc"))
+        self.assertFalse(dfa.full_match("cba"))
+
+    def test_max_states_02(self):
+        # Only the states reached by keys count, not the terms of the
+        # translation, so wide OR-patterns keep their states.
+        literals = [f"tenant-{i:04}" for i in range(1000)]
+        dfa = KxDfa(compile("( " + " | ".join(literals) + " ) & ~(*x*)"))
+        self.assertTrue(dfa.full_match("tenant-0042"))
+        states = len(dfa)
+        self.assertGreater(states, 1)
+        self.assertFalse(dfa.full_match("tenant-004x"))
+        self.assertTrue(dfa.full_match("tenant-0042"))
+        self.assertGreaterEqual(len(dfa), states)
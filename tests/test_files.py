@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+from keylix.files import scan_file
+from keylix.parser import parse
+
+KEYS = [
+    "apples",
+    "",
+    "green apples",
+    "apple pie",
+    "cherries",
+    "fruit salad",
+    "peanut salad",
+    "pineapples and peanuts",
+    "crème brûlée",
+]
+
+
+class TestScanFile(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        file = tempfile.NamedTemporaryFile("wb", suffix=".txt", delete=False)
+        with file:
+            file.write("\n".join(KEYS).encode("utf-8") + b"\n")
+        self.path = file.name
+
+    def tearDown(self):
+        os.remove(self.path)
+        super().tearDown()
+
+    def assert_same_as_scan(self, text: str) -> None:
+        """Compares scan_file() results with a scan of the key list"""
+
+        kx_pattern = parse(text)
+        expected = [key for key in KEYS if kx_pattern.full_match(key)]
+        self.assertEqual(list(scan_file(self.path, kx_pattern)), expected, text)
+
+    def test_scan_file_01(self):
+        for text in [
+            "",
+            "*",
+            "apples",
+            "*apple*",
+            "*salad & ~(*peanut*)",
+            "*brû*",
+            "apples | cherries",
+        ]:
+            self.assert_same_as_scan(text)
+
+    def test_scan_file_02(self):
+        # Patterns that do not compile into a regex are matched line by line.
+        self.assert_same_as_scan("*(~(peanut))salad")
+
+    def test_offsets_01(self):
+        offsets = list(scan_file(self.path, parse("*salad"), offsets=True))
+        with open(self.path, "rb") as file:
+            data = file.read()
+        self.assertEqual(offsets, [data.index(b"fruit"), data.index(b"peanut salad")])
+
+    def test_early_exit_01(self):
+        for key in scan_file(self.path, parse("*")):
+            break
+        self.assertEqual(key, "apples")
+
+    def test_empty_file_01(self):
+        with open(self.path, "wb"):
+            pass
+        self.assertEqual(list(scan_file(self.path, parse("*"))), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
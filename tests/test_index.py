@@ -0,0 +1,127 @@
+import unittest
+
+from keylix.index import KxKeyIndex, KxSortedKeyIndex
+from keylix.parser import parse
+
+KEYS = [
+    "",
+    "apples",
+    "green apples",
+    "apple pie",
+    "cherries",
+    "cherry pie",
+    "fruit salad",
+    "peanut salad",
+    "pineapples",
+    "pineapples and peanuts",
+]
+
+
+class TestKxKeyIndex(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.kx_index = KxKeyIndex(KEYS)
+
+    def assert_same_as_scan(self, text: str) -> None:
+        """Compares the index results with a linear scan"""
+
+        kx_pattern = parse(text)
+        expected = [key for key in KEYS if kx_pattern.full_match(key)]
+        self.assertEqual(self.kx_index.filter(kx_pattern), expected, text)
+
+    def test_filter_01(self):
+        for text in [
+            "",
+            "*",
+            "apples",
+            "*apple*",
+            "*pie",
+            "cherr*",
+            "*salad & ~(*peanut*)",
+            "pineapples & peanuts",
+            "apples | cherries | *pie",
+            "( *apple* | * )",
+            "a*",
+            "~(apple)",
+            "unknown",
+        ]:
+            self.assert_same_as_scan(text)
+
+    def test_candidates_01(self):
+        # Literals are required by concat-patterns.
+        candidates = self.kx_index.candidates(parse("*apple*"))
+        self.assertEqual(
+            [KEYS[i] for i in candidates],
+            [
+                "apples",
+                "green apples",
+                "apple pie",
+                "pineapples",
+                "pineapples and peanuts",
+            ],
+        )
+
+    def test_candidates_02(self):
+        # Literals of OR-patterns are combined.
+        candidates = self.kx_index.candidates(parse("*cherr* | *salad"))
+        self.assertEqual(
+            [KEYS[i] for i in candidates],
+            ["cherries", "cherry pie", "fruit salad", "peanut salad"],
+        )
+
+    def test_candidates_03(self):
+        # Literals shorter than n-grams and wildcards do not restrict the keys.
+        self.assertEqual(len(self.kx_index.candidates(parse("a*"))), len(KEYS))
+        self.assertEqual(len(self.kx_index.candidates(parse("*"))), len(KEYS))
+
+    def test_candidates_04(self):
+        self.assertEqual(self.kx_index.candidates(parse("*unknown*")), [])
+
+
+class TestKxSortedKeyIndex(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.kx_index = KxSortedKeyIndex(KEYS)
+
+    def assert_same_as_scan(self, text: str) -> None:
+        """Compares the index results with a linear scan"""
+
+        kx_pattern = parse(text)
+        expected = sorted(key for key in KEYS if kx_pattern.full_match(key))
+        self.assertEqual(self.kx_index.filter(kx_pattern), expected, text)
+
+    def test_filter_01(self):
+        for text in [
+            "",
+            "*",
+            "apples",
+            "apple*",
+            "*apples",
+            "pine*s",
+            "pineapples*s",
+            "*apple*",
+            "a*",
+            "(cherr)*",
+            "cherr*(|ies)",
+            "apples | cherries",
+            "unknown*",
+        ]:
+            self.assert_same_as_scan(text)
+
+    def test_prefix_range_01(self):
+        start, end = self.kx_index.prefix_range("apple")
+        self.assertEqual(self.kx_index.keys[start:end], ["apple pie", "apples"])
+        start, end = self.kx_index.prefix_range("")
+        self.assertEqual((start, end), (0, len(KEYS)))
+        start, end = self.kx_index.prefix_range("zebra")
+        self.assertEqual(start, end)
+
+    def test_suffix_indices_01(self):
+        indices = self.kx_index.suffix_indices("pie")
+        self.assertEqual(
+            [self.kx_index.keys[i] for i in indices], ["apple pie", "cherry pie"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+
+from keylix.keyset import KxKeySet
+from keylix.parser import parse
+
+QUERIES = {
+    "orders": "orders/*",
+    "created": "*/created",
+    "deleted-users": "users/* & *deleted*",
+    "not-orders": "~(orders)",
+}
+
+
+class TestKxKeySet(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.key_set = KxKeySet(["orders/created", "users/created"])
+        for query_id, text in QUERIES.items():
+            self.key_set.add_query(query_id, parse(text))
+
+    def assert_results(self):
+        # Each result must equal a full rescan of the keys.
+        for query_id, text in QUERIES.items():
+            kx_pattern = parse(text)
+            with self.subTest(query=query_id):
+                self.assertEqual(
+                    set(self.key_set.result(query_id)),
+                    {key for key in self.key_set if kx_pattern.full_match(key)},
+                )
+
+    def test_result_01(self):
+        self.assertEqual(self.key_set.result("orders"), {"orders/created"})
+        self.assertEqual(
+            self.key_set.result("created"), {"orders/created", "users/created"}
+        )
+        self.assert_results()
+
+    def test_add_01(self):
+        self.key_set.add("users/deleted")
+        self.key_set.add("orders/deleted")
+        self.key_set.add("orders/deleted")
+        self.assertEqual(len(self.key_set), 4)
+        self.assertEqual(self.key_set.result("deleted-users"), {"users/deleted"})
+        self.assert_results()
+
+    def test_remove_01(self):
+        self.key_set.remove("orders/created")
+        self.assertNotIn("orders/created", self.key_set)
+        self.assertEqual(self.key_set.result("orders"), set())
+        self.assert_results()
+        with self.assertRaises(KeyError):
+            self.key_set.remove("orders/created")
+        self.key_set.discard("orders/created")
+
+    def test_queries_01(self):
+        self.key_set.add_query("orders", parse("users/*"))
+        self.assertEqual(self.key_set.result("orders"), {"users/created"})
+        self.key_set.remove_query("orders")
+        with self.assertRaises(KeyError):
+            self.key_set.result("orders")
+        self.key_set.add("orders/new")
+        with self.assertRaises(KeyError):
+            self.key_set.remove_query("orders")
+
+
+if __name__ == "__main__":
+    unittest.main()
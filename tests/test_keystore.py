@@ -0,0 +1,59 @@
+import unittest
+
+from keylix.core import KxPatternChars, KxPatternConcat, KxPatternExcludes
+from keylix.keystore import KxKeyStore
+from keylix.parser import parse
+
+KEYS = ["cherry pie", "", "potato salad", "crème brûlée", "peanut salad"]
+
+
+class TestKxKeyStore(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.store = KxKeyStore(KEYS)
+
+    def test_keys_01(self):
+        self.assertEqual(len(self.store), len(KEYS))
+        self.assertEqual(list(self.store), KEYS)
+        self.assertEqual(self.store[3], "crème brûlée")
+        self.assertEqual(self.store[-1], "peanut salad")
+        with self.assertRaises(IndexError):
+            self.store[len(KEYS)]
+        self.assertEqual(self.store.nbytes, len("".join(KEYS).encode()) + 8 * 6)
+
+    def test_slice_01(self):
+        for index in [slice(1, 4), slice(3, None), slice(None, None, 2), slice(4, 2)]:
+            with self.subTest(index=index):
+                self.assertEqual(list(self.store[index]), KEYS[index])
+
+    def test_append_01(self):
+        store = KxKeyStore()
+        store.append("a")
+        store.extend(["b", b"c"])
+        self.assertEqual(list(store), ["a", "b", "c"])
+
+    def test_filter_01(self):
+        for text in ["*salad", "* & ~(*peanut*)", "", "*è*", "cherry|*pie"]:
+            kx_pattern = parse(text)
+            with self.subTest(pattern=text):
+                result = self.store.filter(kx_pattern)
+                self.assertEqual(result.typecode, "Q")
+                self.assertEqual(
+                    list(result),
+                    [i for i, key in enumerate(KEYS) if kx_pattern.full_match(key)],
+                )
+        self.assertEqual(list(self.store.filter(parse("*salad"), 3)), [4])
+        self.assertEqual(list(self.store[2:].filter(parse("*salad"))), [0, 2])
+
+    def test_filter_02(self):
+        # Patterns without a regex are matched by the pattern tree.
+        kx_pattern = KxPatternConcat(
+            [KxPatternChars("cr"), KxPatternExcludes(KxPatternChars("pie"))]
+        )
+        self.assertEqual(list(self.store.filter(kx_pattern)), [3])
+        self.store.append("cream pie")
+        self.assertEqual(list(self.store.filter(parse("cr*"))), [3, 5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import unittest
+
+from keylix.arena import KxKeyArena
+from keylix.parallel import filter_arena, filter_parallel
+from keylix.parser import parse
+
+KEYS = [f"tenant-{i % 7}/object-{i}" for i in range(1000)]
+
+
+class TestFilterParallel(unittest.TestCase):
+    def test_filter_01(self):
+        kx_pattern = parse("tenant-3/*")
+        expected = [key for key in KEYS if kx_pattern.full_match(key)]
+        self.assertEqual(
+            filter_parallel(KEYS, kx_pattern, workers=2, chunksize=100), expected
+        )
+
+    def test_filter_02(self):
+        # indices=True returns the indices of the matching keys.
+        kx_pattern = parse("*-1*")
+        expected = [i for i, key in enumerate(KEYS) if kx_pattern.full_match(key)]
+        self.assertEqual(
+            filter_parallel(KEYS, kx_pattern, workers=2, chunksize=64, indices=True),
+            expected,
+        )
+
+    def test_filter_03(self):
+        # Small inputs are filtered in the calling process.
+        kx_pattern = parse("tenant-3/* & ~(*9*)")
+        expected = [key for key in KEYS if kx_pattern.full_match(key)]
+        self.assertEqual(filter_parallel(KEYS, kx_pattern), expected)
+
+    def test_chunksize_01(self):
+        with self.assertRaises(ValueError):
+            filter_parallel(KEYS, parse("*"), chunksize=0)
+
+
+class TestFilterArena(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.arena = KxKeyArena.create(KEYS)
+        self.addCleanup(self.arena.unlink)
+        self.addCleanup(self.arena.close)
+
+    def test_filter_01(self):
+        kx_pattern = parse("tenant-3/* & ~(*9*)")
+        expected = [i for i, key in enumerate(KEYS) if kx_pattern.full_match(key)]
+        result = filter_arena(self.arena, kx_pattern, workers=2, chunksize=100)
+        self.assertEqual(result.typecode, "Q")
+        self.assertEqual(list(result), expected)
+        self.assertEqual(list(filter_arena(self.arena, kx_pattern)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+
+import keylix
+from keylix.core import (
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternEmpty,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+)
+from keylix.parser import MAX_NESTING_DEPTH, KxSyntaxError, parse
+
+
+class TestParse(unittest.TestCase):
+    def test_empty_01(self):
+        self.assertIsInstance(parse(""), KxPatternEmpty)
+        self.assertIsInstance(parse("   "), KxPatternEmpty)
+
+    def test_chars_01(self):
+        kx_pattern = parse("cherries")
+        self.assertIsInstance(kx_pattern, KxPatternChars)
+        self.assertTrue(kx_pattern.full_match("cherries"))
+        self.assertFalse(kx_pattern.full_match("cherries pie"))
+
+    def test_wildcard_01(self):
+        self.assertIsInstance(parse("*"), KxPatternWildcard)
+
+    def test_concat_01(self):
+        kx_pattern = parse("*cherries*")
+        self.assertIsInstance(kx_pattern, KxPatternConcat)
+        self.assertEqual(str(kx_pattern), "concat( *. chars(cherries). * )")
+        self.assertTrue(kx_pattern.full_match("sweet cherries pie"))
+
+    def test_or_01(self):
+        kx_pattern = parse("apples | oranges")
+        self.assertIsInstance(kx_pattern, KxPatternOr)
+        self.assertTrue(kx_pattern.full_match("apples"))
+        self.assertTrue(kx_pattern.full_match("oranges"))
+        self.assertFalse(kx_pattern.full_match("apples | oranges"))
+
+    def test_or_02(self):
+        # Empty expressions are kept in OR-pattern sequences.
+        kx_pattern = parse("( apples |  | cherries )")
+        self.assertIsInstance(kx_pattern, KxPatternParentheses)
+        self.assertEqual(
+            str(kx_pattern), "( ( chars(apples)| chars()| chars(cherries) ) )"
+        )
+        self.assertTrue(kx_pattern.full_match(""))
+
+    def test_and_01(self):
+        # Empty expressions are ignored in AND-pattern sequences.
+        kx_pattern = parse("pineapples &  & ~(peanuts)")
+        self.assertIsInstance(kx_pattern, KxPatternAnd)
+        self.assertEqual(str(kx_pattern), "( chars(pineapples)& ~(chars(peanuts)) )")
+
+    def test_excludes_01(self):
+        kx_pattern = parse("~( zebras )")
+        self.assertIsInstance(kx_pattern, KxPatternExcludes)
+        self.assertTrue(kx_pattern.full_match("apples"))
+        self.assertFalse(kx_pattern.full_match("zebras"))
+
+    def test_spaces_01(self):
+        expected = str(parse("( ( apple(|s) | bananas ) & ~(zebras) )"))
+        for text in [
+            "((apple(|s)|bananas)&~(zebras))",
+            "( (apple(|s)|bananas) & ~(zebras) )",
+            "( ( apple(|s) | bananas ) & ~( zebras ) )",
+        ]:
+            self.assertEqual(str(parse(text)), expected, text)
+
+    def test_invalid_01(self):
+        for text in [
+            "( apples | bananas & ~(zebras) )",
+            "( apples | bananas & peanuts )",
+            "( ( appl e(|s) | bananas ) & ~(zebras) )",
+            "( ( apple(|s) | bananas ) & ~ (zebras) )",
+            "( apples",
+            "apples )",
+            "{apples}",
+            '"apples"',
+            "app\\les",
+            "app\tles",
+        ]:
+            with self.assertRaises(KxSyntaxError, msg=text):
+                parse(text)
+
+    def test_invalid_02(self):
+        with self.assertRaises(KxSyntaxError) as context:
+            parse("apples | bananas & cherries")
+        self.assertEqual(context.exception.position, 17)
+
+    def test_invalid_03(self):
+        # Deep nesting raises KxSyntaxError, not RecursionError.
+        depth = MAX_NESTING_DEPTH
+        self.assertIsInstance(
+            parse("(" * depth + "a" + ")" * depth), KxPatternParentheses
+        )
+        with self.assertRaises(KxSyntaxError) as context:
+            parse("(" * 2000 + "a" + ")" * 2000)
+        self.assertEqual(context.exception.position, depth)
+        with self.assertRaises(KxSyntaxError):
+            parse("~(" * (depth + 1) + "a" + ")" * (depth + 1))
+
+
+class TestCompile(unittest.TestCase):
+    def test_cache_01(self):
+        kx_pattern = keylix.compile("apples | *cherries*")
+        self.assertIs(keylix.compile("apples | *cherries*"), kx_pattern)
+        self.assertIsNot(keylix.compile("apples | cherries"), kx_pattern)
+
+    def test_cache_02(self):
+        keylix.compile.cache_clear()
+        keylix.compile("apples")
+        keylix.compile("apples")
+        cache_info = keylix.compile.cache_info()
+        self.assertEqual(cache_info.hits, 1)
+        self.assertEqual(cache_info.misses, 1)
+
+    def test_syntax_error_01(self):
+        with self.assertRaises(KxSyntaxError):
+            keylix.compile("( apples")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+
+from keylix.parser import parse
+from keylix.patternset import KxPatternSet
+
+PATTERNS = {
+    "exact": "orders/created",
+    "orders": "orders/*",
+    "orders-or-users": "orders/* | users/*",
+    "nested-or": "(payments | users/*) | *created",
+    "created": "*/created",
+    "deleted-users": "users/* & *deleted*",
+    "not-orders": "~(orders)",
+    "everything": "*",
+    "empty": "",
+}
+
+KEYS = [
+    "",
+    "orders/created",
+    "orders/deleted",
+    "users/created",
+    "users/deleted",
+    "users/undeleted/42",
+    "payments",
+]
+
+
+class TestKxPatternSet(unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.kx_patterns = {
+            pattern_id: parse(text) for pattern_id, text in PATTERNS.items()
+        }
+        self.kx_pattern_set = KxPatternSet(self.kx_patterns)
+
+    def assert_same_as_scan(self) -> None:
+        """Compares KxPatternSet.match() with matching each pattern in turn"""
+
+        for key in KEYS:
+            expected = {
+                pattern_id
+                for pattern_id, kx_pattern in self.kx_patterns.items()
+                if kx_pattern.full_match(key)
+            }
+            self.assertEqual(self.kx_pattern_set.match(key), expected, key)
+
+    def test_match_01(self):
+        self.assert_same_as_scan()
+        self.assertEqual(
+            self.kx_pattern_set.match("orders/created"),
+            {
+                "exact",
+                "orders",
+                "orders-or-users",
+                "nested-or",
+                "created",
+                "everything",
+            },
+        )
+
+    def test_add_01(self):
+        self.kx_patterns["payments"] = parse("pay*")
+        self.kx_pattern_set.add("payments", self.kx_patterns["payments"])
+        self.assertEqual(len(self.kx_pattern_set), len(PATTERNS) + 1)
+        self.assert_same_as_scan()
+
+    def test_add_02(self):
+        # Adding a pattern with an existing ID replaces it.
+        self.kx_patterns["created"] = parse("*/deleted")
+        self.kx_pattern_set.add("created", self.kx_patterns["created"])
+        self.assertEqual(len(self.kx_pattern_set), len(PATTERNS))
+        self.assert_same_as_scan()
+
+    def test_remove_01(self):
+        for pattern_id in ["exact", "orders", "deleted-users", "everything"]:
+            del self.kx_patterns[pattern_id]
+            self.kx_pattern_set.remove(pattern_id)
+            self.assertNotIn(pattern_id, self.kx_pattern_set)
+            self.assert_same_as_scan()
+        with self.assertRaises(KeyError):
+            self.kx_pattern_set.remove("orders")
+
+    def test_or_01(self):
+        # Each branch of an OR-pattern is indexed, so only the patterns of
+        # the matching branches are verified.
+        kx_pattern_set = KxPatternSet(
+            {i: parse(f"orders/{i}/* | invoices/{i}/*") for i in range(100)}
+        )
+        self.assertEqual(kx_pattern_set._unindexed, set())
+        self.assertEqual(kx_pattern_set._candidates("invoices/42/pdf"), {42})
+        self.assertEqual(kx_pattern_set.match("orders/7/items"), {7})
+        kx_pattern_set.remove(7)
+        self.assertEqual(kx_pattern_set.match("orders/7/items"), set())
+        self.assertEqual(kx_pattern_set._prefixes.get("orders/7/"), None)
+
+    def test_or_02(self):
+        # A branch without a literal leaves the pattern unindexed.
+        kx_pattern_set = KxPatternSet({"any": parse("orders/* | ~(users*)")})
+        self.assertEqual(kx_pattern_set._unindexed, {"any"})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import pickle
+import unittest
+
+from keylix.core import KxPatternChars
+from keylix.parser import compile
+from keylix.profiling import KxProfiler
+
+
+class TestKxProfiler(unittest.TestCase):
+    def test_report_01(self):
+        kx_pattern = compile("*salad|apples")
+        with kx_pattern.profile() as profiler:
+            self.assertTrue(kx_pattern.full_match("potato salad"))
+            self.assertTrue(kx_pattern.full_match("apples"))
+            self.assertFalse(kx_pattern.full_match("pears"))
+        root = profiler.report()
+        self.assertIs(root.kx_pattern, kx_pattern)
+        stats = root.stats["full_match"]
+        self.assertEqual((stats.calls, stats.accepts, stats.rejects), (3, 2, 1))
+        self.assertGreater(stats.seconds, 0.0)
+        # "apples" is only tried when "*salad" does not match.
+        concat, chars = root.children
+        self.assertEqual(concat.stats["full_match"].calls, 3)
+        self.assertEqual(chars.stats["full_match"].calls, 2)
+
+    def test_report_02(self):
+        # The DP steps of a concat-pattern are full_match_ends() calls.
+        kx_pattern = compile("a*b")
+        with kx_pattern.profile() as profiler:
+            kx_pattern.full_match("axxb")
+        a, wildcard, b = profiler.report().children
+        self.assertEqual(a.stats["full_match_ends"].calls, 1)
+        self.assertEqual(wildcard.stats["full_match_ends"].calls, 0)
+        self.assertEqual(b.stats["full_match_ends"].calls, 4)
+        self.assertEqual(b.stats["full_match_ends"].accepts, 1)
+        self.assertIn("full_match_ends: 4 calls, 1 accepted", str(profiler.report()))
+
+    def test_callback_01(self):
+        calls = []
+        kx_pattern = KxPatternChars("a")
+        profiler = KxProfiler(
+            kx_pattern,
+            lambda node, method, accepted, _: calls.append((method, accepted)),
+        )
+        profiler.start()
+        kx_pattern.contains_match("xa")
+        kx_pattern.search("x")
+        profiler.stop()
+        self.assertEqual(calls, [("contains_match", True), ("search", False)])
+
+    def test_stop_01(self):
+        # Patterns run unchanged once the profiler is stopped.
+        kx_pattern = compile("a*b")
+        with kx_pattern.profile() as profiler:
+            pass
+        for node in [kx_pattern] + kx_pattern._sub_patterns:
+            self.assertNotIn("full_match", vars(node))
+        kx_pattern.full_match("ab")
+        self.assertEqual(profiler.report().stats["full_match"].calls, 0)
+
+    def test_pickle_01(self):
+        # Patterns being profiled pickle without the profiler's wrappers.
+        kx_pattern = compile("( *salad & ~(*peanut*) ) | apples")
+        with kx_pattern.profile():
+            copy = pickle.loads(pickle.dumps(kx_pattern))
+        self.assertNotIn("full_match", vars(copy))
+        self.assertTrue(copy.full_match("fruit salad"))
+
+
+if __name__ == "__main__":
+    unittest.main()
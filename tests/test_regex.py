@@ -0,0 +1,177 @@
+import unittest
+
+from keylix.core import (
+    KxPattern,
+    KxPatternAnd,
+    KxPatternChars,
+    KxPatternConcat,
+    KxPatternExcludes,
+    KxPatternOr,
+    KxPatternParentheses,
+    KxPatternWildcard,
+)
+from keylix.regex import (
+    KxRegexError,
+    compile_contains_regex,
+    compile_regex,
+    full_match_regex,
+)
+
+TEST_STRINGS = [
+    "",
+    "a",
+    "ab",
+    "ba",
+    "abc",
+    "cab",
+    "abab",
+    "prefix ab",
+    "ab suffix",
+    "prefix ab suffix",
+    "pineapples",
+    "pineapples and peanuts",
+    "peanuts and pineapples",
+    "fruit salad",
+    "peanut salad",
+    "line\nbreak ab",
+]
+
+
+class TestCompileRegex(unittest.TestCase):
+    def assert_same_as_reference(self, kx_pattern: KxPattern) -> None:
+        """Compares the compiled regexes with the reference implementation"""
+
+        re_full = compile_regex(kx_pattern)
+        re_contains = compile_contains_regex(kx_pattern)
+        for string in TEST_STRINGS:
+            self.assertEqual(
+                re_full.fullmatch(string) is not None,
+                kx_pattern.full_match(string),
+                f'full_match() mismatch for {kx_pattern} and "{string}".',
+            )
+            self.assertEqual(
+                re_contains.match(string) is not None,
+                kx_pattern.contains_match(string),
+                f'contains_match() mismatch for {kx_pattern} and "{string}".',
+            )
+
+    def test_chars_01(self):
+        self.assert_same_as_reference(KxPatternChars(""))
+        self.assert_same_as_reference(KxPatternChars("ab"))
+        self.assert_same_as_reference(KxPatternChars("a.b*"))
+
+    def test_wildcard_01(self):
+        self.assert_same_as_reference(KxPatternWildcard())
+
+    def test_or_01(self):
+        self.assert_same_as_reference(KxPatternOr([]))
+        self.assert_same_as_reference(
+            KxPatternOr([KxPatternChars("ab"), KxPatternChars("")])
+        )
+        self.assert_same_as_reference(
+            KxPatternOr([KxPatternChars("abc"), KxPatternWildcard()])
+        )
+
+    def test_concat_01(self):
+        self.assert_same_as_reference(KxPatternConcat([]))
+        self.assert_same_as_reference(
+            KxPatternConcat(
+                [KxPatternWildcard(), KxPatternChars("ab"), KxPatternWildcard()]
+            )
+        )
+        self.assert_same_as_reference(
+            KxPatternConcat(
+                [
+                    KxPatternChars("ab"),
+                    KxPatternParentheses(
+                        KxPatternOr([KxPatternChars(""), KxPatternChars("c")])
+                    ),
+                ]
+            )
+        )
+
+    def test_and_01(self):
+        # pattern: pineapples & ~(peanuts)
+        self.assert_same_as_reference(
+            KxPatternAnd(
+                [
+                    KxPatternChars("pineapples"),
+                    KxPatternExcludes(KxPatternChars("peanuts")),
+                ]
+            )
+        )
+        self.assert_same_as_reference(KxPatternAnd([]))
+        self.assert_same_as_reference(
+            KxPatternAnd([KxPatternChars("ab"), KxPatternChars("b")])
+        )
+
+    def test_excludes_01(self):
+        self.assert_same_as_reference(KxPatternExcludes(KxPatternChars("")))
+        self.assert_same_as_reference(KxPatternExcludes(KxPatternChars("ab")))
+        self.assert_same_as_reference(KxPatternExcludes(KxPatternWildcard()))
+        self.assert_same_as_reference(
+            KxPatternExcludes(KxPatternOr([KxPatternChars(""), KxPatternChars("ab")]))
+        )
+
+    def test_nested_01(self):
+        # pattern: ( apple | ( *salad & ~(*peanut*) ) )
+        kx_pattern = KxPatternParentheses(
+            KxPatternOr(
+                [
+                    KxPatternChars("apple"),
+                    KxPatternParentheses(
+                        KxPatternAnd(
+                            [
+                                KxPatternConcat(
+                                    [KxPatternWildcard(), KxPatternChars("salad")]
+                                ),
+                                KxPatternExcludes(
+                                    KxPatternConcat(
+                                        [
+                                            KxPatternWildcard(),
+                                            KxPatternChars("peanut"),
+                                            KxPatternWildcard(),
+                                        ]
+                                    )
+                                ),
+                            ]
+                        )
+                    ),
+                ]
+            )
+        )
+        self.assert_same_as_reference(kx_pattern)
+
+    def test_wide_or_01(self):
+        # The first-found chain of an OR-pattern in an AND-pattern grows in
+        # n log n, not n * n.
+        literals = [f"tenant-{i:04}" for i in range(1000)]
+        kx_pattern = KxPatternAnd(
+            [
+                KxPatternOr([KxPatternChars(literal) for literal in literals]),
+                KxPatternConcat(
+                    [KxPatternWildcard(), KxPatternChars("5"), KxPatternWildcard()]
+                ),
+            ]
+        )
+        self.assertLess(len(full_match_regex(kx_pattern)), 200000)
+        for literals in [["ab", "b"], ["c", "pine", "ba", "", "salad", "a", "ab"]]:
+            or_pattern = KxPatternOr([KxPatternChars(lit) for lit in literals])
+            self.assert_same_as_reference(KxPatternAnd([or_pattern]))
+            self.assert_same_as_reference(KxPatternExcludes(or_pattern))
+        re_full = compile_regex(kx_pattern)
+        for key in ["tenant-0005", "tenant-0500", "tenant-0004", "tenant-x5"]:
+            self.assertEqual(
+                re_full.fullmatch(key) is not None, kx_pattern.full_match(key), key
+            )
+
+    def test_unsupported_01(self):
+        kx_pattern = KxPatternConcat(
+            [KxPatternChars("ab"), KxPatternExcludes(KxPatternChars("c"))]
+        )
+        with self.assertRaises(KxRegexError):
+            compile_regex(kx_pattern)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+
+from keylix.core import KxPatternEmpty, KxPatternOr
+from keylix.parser import parse
+from keylix.serialize import (
+    KxFormatError,
+    KxPatternBundle,
+    dump_bundle,
+    dumps,
+    loads,
+)
+
+PATTERNS = {
+    "salad": "( *salad & ~(*peanut*) ) | apples",
+    "pie": "cherr*(|y)pie",
+    "everything": "*",
+    "literals": "a|b|c|d|e|f|g|h|ab",
+}
+
+KEYS = ["", "apples", "potato salad", "peanut salad", "cherry pie", "cherpie", "ab"]
+
+
+class TestSerialize(unittest.TestCase):
+    def assert_same_matches(self, kx_pattern, loaded):
+        self.assertEqual(str(loaded), str(kx_pattern))
+        for key in KEYS:
+            with self.subTest(pattern=str(kx_pattern), key=key):
+                self.assertEqual(loaded.full_match(key), kx_pattern.full_match(key))
+                kx_match = kx_pattern.search(key)
+                loaded_match = loaded.search(key)
+                self.assertEqual(
+                    None if kx_match is None else (kx_match.start, kx_match.end),
+                    (
+                        None
+                        if loaded_match is None
+                        else (loaded_match.start, loaded_match.end)
+                    ),
+                )
+
+    def test_loads_01(self):
+        for text in PATTERNS.values():
+            kx_pattern = parse(text)
+            self.assert_same_matches(kx_pattern, loads(dumps(kx_pattern)))
+        self.assertIsInstance(loads(dumps(KxPatternEmpty())), KxPatternEmpty)
+
+    def test_loads_02(self):
+        # A built automaton is stored with the pattern.
+        kx_pattern = parse(PATTERNS["literals"])
+        self.assertIsInstance(kx_pattern, KxPatternOr)
+        data = dumps(kx_pattern)
+        self.assertIsNone(loads(data)._automaton)
+        kx_pattern.full_match("ab")
+        loaded = loads(dumps(kx_pattern))
+        self.assertIsNotNone(loaded._automaton)
+        self.assertEqual(loaded._automaton._goto, kx_pattern._automaton._goto)
+        self.assert_same_matches(kx_pattern, loaded)
+
+    def test_loads_03(self):
+        data = dumps(parse("a*"))
+        with self.assertRaises(KxFormatError):
+            loads(b"KXB" + data[3:])
+        with self.assertRaises(KxFormatError):
+            loads(data[:3] + b"\x63" + data[4:])
+        with self.assertRaises(KxFormatError):
+            loads(data[:-1])
+
+    def test_bundle_01(self):
+        kx_patterns = {name: parse(text) for name, text in PATTERNS.items()}
+        bundle = KxPatternBundle(dump_bundle(kx_patterns))
+        self.assertEqual(list(bundle), list(PATTERNS))
+        self.assertEqual(len(bundle), len(PATTERNS))
+        # Trees are decoded on first access only.
+        self.assertEqual(bundle._patterns, {})
+        self.assert_same_matches(kx_patterns["pie"], bundle["pie"])
+        self.assertIs(bundle["pie"], bundle["pie"])
+        self.assertEqual(list(bundle._patterns), ["pie"])
+        with self.assertRaises(KeyError):
+            bundle["missing"]
+
+    def test_bundle_02(self):
+        kx_patterns = {name: parse(text) for name, text in PATTERNS.items()}
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "patterns.kxb")
+            with open(path, "wb") as f:
+                f.write(dump_bundle(kx_patterns))
+            with KxPatternBundle.open(path) as bundle:
+                self.assert_same_matches(kx_patterns["salad"], bundle["salad"])
+
+
+if __name__ == "__main__":
+    unittest.main()